@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import click
+import numpy as np
+import scipy
+
+from simulation.demo_5.server_system import ServerSystem, Simulation, exercise_distributions
+from simulation.demo_6.e_approximation import estimate_e
+from simulation.heuristics.n_queens import Chessboard, Solver
+
+
+@dataclass
+class BenchmarkCase:
+    """A named workload; `run` performs it once and returns the number of units of work it did."""
+
+    name: str
+    unit: str
+    run: Callable[[], int]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    unit: str
+    work: int
+    wall_time_seconds: float
+    peak_memory_bytes: int
+
+    @property
+    def rate(self) -> float:
+        return self.work / self.wall_time_seconds if self.wall_time_seconds > 0 else float("inf")
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), f"{self.unit}_per_second": self.rate}
+
+
+def _solver_case(number_of_queens: int, seed: int) -> BenchmarkCase:
+    def run() -> int:
+        board = Chessboard.from_random_permutation(number_of_queens, seed=seed)
+        solver = Solver(board, max_steps=100 * number_of_queens, incremental=True)
+        solver.solve()
+        return solver.current_step
+
+    return BenchmarkCase(f"solver[n={number_of_queens},seed={seed}]", "steps", run)
+
+
+def _server_system_case(exercise: str, engine: str) -> BenchmarkCase:
+    def run() -> int:
+        interarrival_time_rv, service_time_rvs = exercise_distributions(exercise)
+        server_system = ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine=engine)
+        server_system.run(seed=0)
+        total_customers = server_system.summary()[0]
+        return 2 * total_customers  # an arrival and a departure per customer
+
+    return BenchmarkCase(f"server_system[exercise={exercise},engine={engine}]", "events", run)
+
+
+def _simulation_case(exercise: str, number_of_simulations: int) -> BenchmarkCase:
+    def run() -> int:
+        interarrival_time_rv, service_time_rvs = exercise_distributions(exercise)
+        simulation = Simulation(number_of_simulations, 9.0, interarrival_time_rv, service_time_rvs, engine="fast")
+        return 2 * int(simulation.results[:, 0].sum())
+
+    return BenchmarkCase(f"simulation[exercise={exercise},n={number_of_simulations}]", "events", run)
+
+
+def _estimate_e_case(n_runs: int) -> BenchmarkCase:
+    def run() -> int:
+        estimate_e(n_runs)
+        return n_runs
+
+    return BenchmarkCase(f"estimate_e[n_runs={n_runs}]", "runs", run)
+
+
+def default_cases(quick: bool = False) -> list[BenchmarkCase]:
+    """The hot paths of the package; `quick` keeps only the small sizes, for smoke runs."""
+    board_sizes = [8, 64] if quick else [8, 64, 256, 1000]
+    replication_counts = [10] if quick else [10, 100, 1000]
+    e_runs = [1_000] if quick else [1_000, 10_000, 100_000]
+    return [
+        *(_solver_case(n, seed) for n in board_sizes for seed in range(3)),
+        *(_server_system_case(exercise, engine) for exercise in ["1", "2"] for engine in ["simpy", "heap", "fast"]),
+        *(_simulation_case(exercise, n) for exercise in ["1", "2"] for n in replication_counts),
+        *(_estimate_e_case(n_runs) for n_runs in e_runs),
+    ]
+
+
+def run_case(case: BenchmarkCase, repeats: int = 3) -> BenchmarkResult:
+    """Time the best of `repeats` runs, then measure the peak traced memory in a separate run.
+
+    Tracing slows allocations down, so it is kept out of the timed runs. Only the memory allocated by this process
+    is traced, not that of worker processes.
+    """
+    wall_times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        work = case.run()
+        wall_times.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(case.name, case.unit, work, min(wall_times), peak_memory)
+
+
+def run_benchmarks(cases: list[BenchmarkCase], repeats: int = 3) -> dict:
+    # The per-event debug logs would dominate the timings.
+    logging.disable(logging.INFO)
+    try:
+        results = [run_case(case, repeats).to_dict() for case in cases]
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "results": results,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, max_slowdown: float) -> list[tuple[str, float]]:
+    """Return `(name, slowdown)` for every benchmark whose wall time grew by more than `max_slowdown` times.
+
+    Benchmarks missing from either file are ignored.
+    """
+    baseline_times = {result["name"]: result["wall_time_seconds"] for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        if result["name"] in baseline_times and baseline_times[result["name"]] > 0:
+            slowdown = result["wall_time_seconds"] / baseline_times[result["name"]]
+            if slowdown > max_slowdown:
+                regressions.append((result["name"], slowdown))
+    return regressions
+
+
+@click.command()
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path("benchmark_results.json"),
+    help="Write the results to this JSON file (default: benchmark_results.json).",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Compare against a results file saved from an earlier run.",
+)
+@click.option(
+    "--max-slowdown",
+    type=float,
+    default=1.25,
+    help="Fail if a benchmark is this many times slower than in the baseline (default: 1.25).",
+)
+@click.option("--repeats", type=int, default=3, help="Timed runs per benchmark; the fastest counts (default: 3).")
+@click.option("--quick", is_flag=True, help="Run the small sizes only.")
+def main(output: Path, baseline: Path | None, max_slowdown: float, repeats: int, quick: bool) -> None:
+    results = run_benchmarks(default_cases(quick), repeats)
+    output.write_text(json.dumps(results, indent=2))
+    for result in results["results"]:
+        rate = result[f"{result['unit']}_per_second"]
+        click.echo(
+            f"{result['name']:<45} {result['wall_time_seconds'] * 1000:>10.2f} ms "
+            f"{rate:>14,.0f} {result['unit']}/s {result['peak_memory_bytes'] / 2**20:>8.2f} MiB"
+        )
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, json.loads(baseline.read_text()), max_slowdown)
+        for name, slowdown in regressions:
+            click.echo(f"Regression: {name} is {slowdown:.2f}x slower than the baseline.", err=True)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# A runtime alias, so `typing.Union` rather than `|`, which needs Python 3.10.
+RandomGenerator = Union[random.Random, np.random.Generator]
+
+
+def save_checkpoint(path: Path, arrays: dict[str, np.ndarray], metadata: dict) -> None:
+    """Write the arrays and the JSON-serializable metadata to an uncompressed `.npz` file.
+
+    The file is written next to `path` and then renamed over it, so a run killed while saving leaves the previous
+    checkpoint intact.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    with temporary_path.open("wb") as f:
+        np.savez(f, **arrays, metadata=np.array(json.dumps(metadata)))  # type: ignore[arg-type]
+    os.replace(temporary_path, path)
+
+
+def save_array(path: Path, array: np.ndarray) -> None:
+    """Write a single array to a `.npy` file, replacing `path` only once the file is complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    with temporary_path.open("wb") as f:
+        np.save(f, array)
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: Path) -> tuple[dict[str, np.ndarray], dict]:
+    with np.load(path) as checkpoint:
+        arrays = {name: checkpoint[name] for name in checkpoint.files if name != "metadata"}
+        metadata = json.loads(str(checkpoint["metadata"]))
+    return arrays, metadata
+
+
+def rng_state(rng: RandomGenerator | None) -> dict:
+    """The state of `rng` as JSON-serializable values; `None` stands for the global `random` module."""
+    if isinstance(rng, np.random.Generator):
+        return {"kind": "numpy", "state": rng.bit_generator.state}
+    version, internal_state, gauss_next = random.getstate() if rng is None else rng.getstate()
+    return {"kind": "random" if rng is not None else "global", "state": [version, list(internal_state), gauss_next]}
+
+
+def restore_rng(state: dict) -> RandomGenerator | None:
+    """Recreate a generator saved by `rng_state`; the state of the global `random` module is restored in place."""
+    if state["kind"] == "numpy":
+        bit_generator = getattr(np.random, state["state"]["bit_generator"])()
+        bit_generator.state = state["state"]
+        return np.random.Generator(bit_generator)
+    version, internal_state, gauss_next = state["state"]
+    if state["kind"] == "global":
+        random.setstate((version, tuple(internal_state), gauss_next))
+        return None
+    rng = random.Random()  # noqa: S311
+    rng.setstate((version, tuple(internal_state), gauss_next))
+    return rng
@@ -0,0 +1,116 @@
+from collections import deque
+from heapq import heappop, heappush
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import scipy.stats as stats
+
+DISCIPLINES = ("fifo", "lifo", "shortest-service")
+SERVER_SELECTIONS = ("lowest-id", "fastest")
+
+
+class WaitingQueue(Protocol):
+    """The customers waiting for a server; `key` is the priority used by `shortest-service`."""
+
+    def push(self, key: float, customer_id: int) -> None: ...
+
+    def pop(self) -> int: ...
+
+    def __len__(self) -> int: ...
+
+
+class FifoQueue:
+    def __init__(self) -> None:
+        self._customers: deque[int] = deque()
+
+    def push(self, key: float, customer_id: int) -> None:
+        self._customers.append(customer_id)
+
+    def pop(self) -> int:
+        return self._customers.popleft()
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+
+class LifoQueue:
+    def __init__(self) -> None:
+        self._customers: list[int] = []
+
+    def push(self, key: float, customer_id: int) -> None:
+        self._customers.append(customer_id)
+
+    def pop(self) -> int:
+        return self._customers.pop()
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+
+class PriorityQueue:
+    """Serves the customer with the smallest key first; ties go to the earlier arrival."""
+
+    def __init__(self) -> None:
+        self._customers: list[tuple[float, int]] = []
+
+    def push(self, key: float, customer_id: int) -> None:
+        heappush(self._customers, (key, customer_id))
+
+    def pop(self) -> int:
+        return heappop(self._customers)[1]
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+
+def waiting_queue(discipline: str) -> WaitingQueue:
+    if discipline == "fifo":
+        return FifoQueue()
+    if discipline == "lifo":
+        return LifoQueue()
+    if discipline == "shortest-service":
+        return PriorityQueue()
+    raise ValueError(f"Unknown discipline: {discipline!r}, expected one of {DISCIPLINES}.")  # noqa: TRY003
+
+
+def server_order(server_selection: str, service_time_rvs: "list[stats.rv_continuous]") -> list[int]:
+    """The server ids in the order in which free servers are picked: by id, or by mean service time."""
+    if server_selection == "lowest-id":
+        return list(range(len(service_time_rvs)))
+    if server_selection == "fastest":
+        return sorted(range(len(service_time_rvs)), key=lambda server_id: service_time_rvs[server_id].mean())
+    raise ValueError(  # noqa: TRY003
+        f"Unknown server selection: {server_selection!r}, expected one of {SERVER_SELECTIONS}."
+    )
+
+
+class ServiceRequirements:
+    """Service times known on arrival, as needed to serve the shortest job first.
+
+    Every customer draws a uniform quantile `u` on arrival, and its service time on server `s` is the `u`-quantile
+    of that server's distribution. So the shortest job is the same for every server, even if the servers differ.
+    The quantiles are drawn and transformed in vectorized blocks.
+    """
+
+    def __init__(
+        self, service_time_rvs: "list[stats.rv_continuous]", random_state: np.random.Generator, block_size: int = 1024
+    ):
+        self.service_time_rvs = service_time_rvs
+        self.random_state = random_state
+        self.block_size = block_size
+        self.quantiles: list[float] = []
+        self.service_times: list[list[float]] = [[] for _ in service_time_rvs]
+
+    def quantile(self, customer_id: int) -> float:
+        while customer_id >= len(self.quantiles):
+            block = self.random_state.random(self.block_size)
+            self.quantiles.extend(block.tolist())
+            for service_times, rv in zip(self.service_times, self.service_time_rvs):
+                service_times.extend(rv.ppf(block).tolist())
+        return self.quantiles[customer_id]
+
+    def service_time(self, server_id: int, customer_id: int) -> float:
+        self.quantile(customer_id)
+        return self.service_times[server_id][customer_id]
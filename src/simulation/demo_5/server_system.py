@@ -1,77 +1,195 @@
+from __future__ import annotations
+
 import logging
-from concurrent.futures import ProcessPoolExecutor
-from dataclasses import dataclass
+import math
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
 from heapq import heapify, heappop, heappush
-from typing import ClassVar
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
 import numpy as np
-import scipy.stats as stats
-import simpy
 
-logging.basicConfig(level="DEBUG", format="%(levelname)s - %(message)s")
+from simulation.checkpoints import load_checkpoint, save_array, save_checkpoint
+from simulation.demo_5.dispatch import (
+    DISCIPLINES,
+    SERVER_SELECTIONS,
+    ServiceRequirements,
+    server_order,
+    waiting_queue,
+)
+from simulation.demo_5.traces import write_trace
+from simulation.demo_5.variates import VariateBuffer, spawn_variate_buffers
+from simulation.instrumentation import InstrumentationStats
+from simulation.running_statistics import RunningStatistics, critical_value
+
+if TYPE_CHECKING:
+    import scipy.stats as stats
+    import simpy
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _discard_log(*args: object) -> None:
+    pass
+
+
+class CustomerLog:
+    """Columnar store of the customers of a run, in arrival order.
+
+    Every column is a preallocated NumPy array that doubles its capacity when full, so a customer costs
+    28 bytes. Missing service times are stored as NaN and missing server ids as -1.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.size = 0
+        self.arrival_times = np.empty(capacity)
+        self.service_start_times = np.full(capacity, np.nan)
+        self.service_times = np.full(capacity, np.nan)
+        self.server_ids = np.full(capacity, -1, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, customer_id: int) -> Customer:
+        if not 0 <= customer_id < self.size:
+            raise IndexError(customer_id)
+        return Customer(self, customer_id)
+
+    def __iter__(self) -> Iterator[Customer]:
+        return (Customer(self, customer_id) for customer_id in range(self.size))
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self.arrival_times):
+            return
+        capacity = max(capacity, 2 * len(self.arrival_times))
+        extra = capacity - len(self.arrival_times)
+        self.arrival_times = np.concatenate([self.arrival_times, np.empty(extra)])
+        self.service_start_times = np.concatenate([self.service_start_times, np.full(extra, np.nan)])
+        self.service_times = np.concatenate([self.service_times, np.full(extra, np.nan)])
+        self.server_ids = np.concatenate([self.server_ids, np.full(extra, -1, dtype=np.int32)])
+
+    def append(self, arrival_time: float) -> int:
+        """Record an arriving customer and return its id."""
+        self._reserve(self.size + 1)
+        customer_id = self.size
+        self.arrival_times[customer_id] = arrival_time
+        self.size += 1
+        return customer_id
+
+    def extend(
+        self,
+        arrival_times: np.ndarray,
+        service_start_times: np.ndarray,
+        service_times: np.ndarray,
+        server_ids: np.ndarray | int,
+    ) -> None:
+        """Record a block of customers whose service is already known."""
+        start, stop = self.size, self.size + len(arrival_times)
+        self._reserve(stop)
+        self.arrival_times[start:stop] = arrival_times
+        self.service_start_times[start:stop] = service_start_times
+        self.service_times[start:stop] = service_times
+        self.server_ids[start:stop] = server_ids
+        self.size = stop
+
+    @property
+    def departure_times(self) -> np.ndarray:
+        departure_times: np.ndarray = self.service_start_times[: self.size] + self.service_times[: self.size]
+        return departure_times
+
+
 class Customer:
-    arrival_time: float
+    """View of one customer in a `CustomerLog`; the values live in the log's columns."""
+
+    __slots__ = ("customer_id", "log")
 
-    _service_start_time: float | None = None
-    _service_time: float | None = None
+    def __init__(self, log: CustomerLog, customer_id: int):
+        self.log = log
+        self.customer_id = customer_id
 
-    _customer_id: ClassVar[int] = 0
+    def __repr__(self) -> str:
+        return f"Customer(customer_id={self.customer_id}, arrival_time={self.arrival_time})"
+
+    @property
+    def arrival_time(self) -> float:
+        return float(self.log.arrival_times[self.customer_id])
 
     @property
     def departure_time(self) -> float:
-        if self.service_start_time is None:
-            raise ValueError("Service has not started yet.")  # noqa: TRY003
         return self.service_start_time + self.service_time
 
     @property
     def service_start_time(self) -> float:
-        if self._service_start_time is None:
+        value = float(self.log.service_start_times[self.customer_id])
+        if np.isnan(value):
             raise ValueError("Service has not started yet.")  # noqa: TRY003
-        return self._service_start_time
+        return value
 
     @service_start_time.setter
     def service_start_time(self, value: float) -> None:
-        self._service_start_time = value
+        self.log.service_start_times[self.customer_id] = value
 
     @property
     def service_time(self) -> float:
-        if self._service_time is None:
+        value = float(self.log.service_times[self.customer_id])
+        if np.isnan(value):
             raise ValueError("Service has not started yet.")  # noqa: TRY003
-        return self._service_time
+        return value
 
     @service_time.setter
     def service_time(self, value: float) -> None:
-        self._service_time = value
+        self.log.service_times[self.customer_id] = value
+
+    @property
+    def server_id(self) -> int:
+        value = int(self.log.server_ids[self.customer_id])
+        if value < 0:
+            raise ValueError("Service has not started yet.")  # noqa: TRY003
+        return value
 
-    def __post_init__(self):
-        self.customer_id = Customer._customer_id
-        Customer._customer_id += 1
-        logger.debug(f"{self.arrival_time:.4f}: #{self.customer_id} arrives")
+    @server_id.setter
+    def server_id(self, value: int) -> None:
+        self.log.server_ids[self.customer_id] = value
 
     def run(
         self,
         env: simpy.Environment,
         server: simpy.PriorityResource,
         server_ids: list[int],
-        service_time_rvs: list[stats.rv_continuous],
+        service_time_samplers: list[Callable[[], float]],
+        log_debug: Callable[..., None] = logger.debug,
+        priority: float | None = None,
+        server_order: list[int] | None = None,
     ):
-        with server.request(priority=self.arrival_time) as req:  # type: ignore  # noqa: PGH003
+        """Wait for a server, by arrival time unless `priority` is given, and take the free server of lowest rank.
+
+        `server_ids` is the heap of the ranks of the free servers; `server_order` maps a rank to a server id.
+        """
+        with server.request(priority=self.arrival_time if priority is None else priority) as req:  # type: ignore  # noqa: PGH003
             yield req
-            self.server_id = heappop(server_ids)
+            rank = heappop(server_ids)
+            server_id = rank if server_order is None else server_order[rank]
+            service_time = service_time_samplers[server_id]()
+            self.server_id = server_id
             self.service_start_time = env.now
-            self.service_time = service_time_rvs[self.server_id].rvs()
-            logger.debug(
-                f"{self.service_start_time:.4f}: #{self.customer_id} starts service on server {self.server_id}"
-            )
+            self.service_time = service_time
+            log_debug("%.4f: #%d starts service on server %d", env.now, self.customer_id, server_id)
+
+            yield env.timeout(service_time)
+            log_debug("%.4f: #%d ends service on server %d", env.now, self.customer_id, server_id)
+            heappush(server_ids, rank)
 
-            yield env.timeout(self.service_time)
-            logger.debug(f"{env.now:.4f}: #{self.customer_id} ends service on server {self.server_id}")
-            heappush(server_ids, self.server_id)
+
+ENGINES = ("simpy", "heap", "fast")
+# The heap and fast engines draw their variates in blocks of this size unless told otherwise; see `VariateBuffer`.
+DEFAULT_VARIATE_BLOCK_SIZE = 256
 
 
 class ServerSystem:
@@ -80,21 +198,60 @@ class ServerSystem:
         arrival_end_time: float,
         interarrival_time_rv: stats.rv_continuous,
         service_time_rvs: list[stats.rv_continuous],
+        engine: str = "simpy",
+        variate_block_size: int | None = None,
+        stats: InstrumentationStats | None = None,
+        discipline: str = "fifo",
+        server_selection: str = "lowest-id",
     ):
-        self.env = simpy.Environment()
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine!r}, expected one of {ENGINES}.")  # noqa: TRY003
+        if discipline not in DISCIPLINES:
+            raise ValueError(f"Unknown discipline: {discipline!r}, expected one of {DISCIPLINES}.")  # noqa: TRY003
+        self.engine = engine
+        # The order in which waiting customers are served, see `simulation.demo_5.dispatch`.
+        self.discipline = discipline
+        self._requirements: ServiceRequirements | None = None
         self.arrival_end_time = arrival_end_time
         self.interarrival_time_rv = interarrival_time_rv
 
         self.num_servers = len(service_time_rvs)
         self.service_time_rvs = service_time_rvs
-        self.server = simpy.PriorityResource(self.env, capacity=self.num_servers)
+        # With a block size the variates come from per-stream buffers created in `run`, see `VariateBuffer`.
+        # The heap and fast engines always use them; SimPy calls `rvs()` per variate unless a block size is given.
+        if variate_block_size is None and engine != "simpy":
+            variate_block_size = DEFAULT_VARIATE_BLOCK_SIZE
+        self.variate_block_size = variate_block_size
+        self._sample_interarrival_time: Callable[[], float] = interarrival_time_rv.rvs
+        self._service_time_samplers: list[Callable[[], float]] = [rv.rvs for rv in service_time_rvs]
+        self._interarrival_times: VariateBuffer | None = None
+        self._service_times: list[VariateBuffer] | None = None
+        # With stats, `run` times the whole run, the sampling and the debug logging, and counts the events.
+        self.stats = stats
+        self._log_debug: Callable[..., None] = logger.debug
+        if engine == "simpy":
+            import simpy
+
+            self.env = simpy.Environment()
+            self.server = simpy.PriorityResource(self.env, capacity=self.num_servers)
+        # A free server is picked by its rank in `server_order`, so `server_ids` is a heap of the free servers' ranks.
+        self.server_selection = server_selection
+        self.server_order = server_order(server_selection, service_time_rvs)
+        self.server_ranks = [0] * self.num_servers
+        for rank, server_id in enumerate(self.server_order):
+            self.server_ranks[server_id] = rank
         self.server_ids = list(range(self.num_servers))
 
         heapify(self.server_ids)
-        self.customers: list[Customer] = []
+        self.customer_log = CustomerLog()
+
+    @property
+    def customers(self) -> tuple[Customer, ...]:
+        """Read-only views of the customers so far; they are stored in `customer_log`, where new ones go."""
+        return tuple(self.customer_log)
 
     def generate_interarrival_time(self):
-        return self.interarrival_time_rv.rvs()
+        return self._sample_interarrival_time()
 
     def arrival(self):
         while self.env.now <= self.arrival_end_time:
@@ -103,29 +260,218 @@ class ServerSystem:
             if self.env.now > self.arrival_end_time:
                 break
 
-            customer = Customer(arrival_time=self.env.now)
-            self.customers.append(customer)
-            self.env.process(customer.run(self.env, self.server, self.server_ids, self.service_time_rvs))
+            customer = self.customer_log[self.customer_log.append(self.env.now)]
+            self._log_debug("%.4f: #%d arrives", self.env.now, customer.customer_id)
+            if self.stats is not None:
+                self.stats.record("queue_length", len(self.server.queue))
+            priority = None
+            service_time_samplers = self._service_time_samplers
+            if self.discipline == "lifo":
+                priority = -self.env.now
+            elif self._requirements is not None:
+                priority = self._requirements.quantile(customer.customer_id)
+                service_time_samplers = [
+                    partial(self._requirements.service_time, server_id, customer.customer_id)
+                    for server_id in range(self.num_servers)
+                ]
+            self.env.process(
+                customer.run(
+                    self.env,
+                    self.server,
+                    self.server_ids,
+                    service_time_samplers,
+                    self._log_debug,
+                    priority,
+                    self.server_order,
+                )
+            )
 
     def run(self, seed: int = 42) -> None:
         np.random.seed(seed)
+        if self.variate_block_size is not None:
+            self._interarrival_times, self._service_times = spawn_variate_buffers(
+                seed, self.interarrival_time_rv, self.service_time_rvs, self.variate_block_size
+            )
+            self._sample_interarrival_time = self._interarrival_times.draw
+            self._service_time_samplers = [buffer.draw for buffer in self._service_times]
+        if self.discipline == "shortest-service":
+            # The requirements get a stream of their own, after those of `spawn_variate_buffers`.
+            self._requirements = ServiceRequirements(
+                self.service_time_rvs,
+                np.random.default_rng(seed).spawn(self.num_servers + 2)[-1],
+                self.variate_block_size or 1024,
+            )
+        # Skip the per-event calls altogether unless debug logging is on.
+        self._log_debug = logger.debug if logger.isEnabledFor(logging.DEBUG) else _discard_log
+        if self.stats is not None:
+            self._sample_interarrival_time = self.stats.timed("sampling", self._sample_interarrival_time)
+            self._service_time_samplers = [self.stats.timed("sampling", f) for f in self._service_time_samplers]
+            self._log_debug = self.stats.timed("logging", self._log_debug)
+            if self._requirements is not None:
+                self._requirements.quantile = self.stats.timed("sampling", self._requirements.quantile)  # type: ignore[method-assign]
         logger.info("Starting simulation...")
-        self.env.process(self.arrival())
-        self.env.run()
+        start_time = time.perf_counter()
+        if self.engine == "fast" and self.num_servers == 1 and self.discipline == "fifo":
+            self._run_lindley()
+        elif self.engine in ("heap", "fast"):
+            self._run_heap()
+        else:
+            self.env.process(self.arrival())
+            self.env.run()
+        if self.stats is not None:
+            self.stats.add_time("run", time.perf_counter() - start_time)
+            self.stats.count("run")
+            self.stats.count("arrivals", len(self.customer_log))
+            self.stats.count("departures", len(self.customer_log))
+
+    def _draw_arrival_times(self, draw_interarrival_times: Callable[[int], np.ndarray]) -> np.ndarray:
+        """The arrival times up to the end time, accumulated from blocks of pre-drawn interarrival times.
+
+        Each block is summed sequentially from the previous arrival time, `now + interarrival_time` at a time,
+        so the times are exactly those of the SimPy arrival process.
+        """
+        block_size = self.variate_block_size or DEFAULT_VARIATE_BLOCK_SIZE
+        blocks = []
+        last_arrival_time = 0.0
+        while last_arrival_time <= self.arrival_end_time:
+            block = np.cumsum(np.concatenate([[last_arrival_time], draw_interarrival_times(block_size)]))[1:]
+            blocks.append(block)
+            last_arrival_time = block[-1]
+        arrival_times = np.concatenate(blocks)
+        return arrival_times[: np.searchsorted(arrival_times, self.arrival_end_time, side="right")]
+
+    def _draw_service_times_per_server(self, total_customers: int) -> tuple[list[list[float]], list[float]]:
+        """Every server's service times and every customer's key in the waiting queue, for `total_customers`.
+
+        With `shortest-service`, the keys are the customers' quantiles and `service_times[s][c]` is the service time
+        of customer `c` on server `s`. Otherwise the keys are zero and `service_times[s]` are the successive service
+        times of server `s`, enough for every customer.
+        """
+        if self._requirements is not None:
+            if total_customers > 0:
+                self._requirements.quantile(total_customers - 1)
+            return self._requirements.service_times, self._requirements.quantiles
+        draw_service_times = [buffer.draw_many for buffer in self._service_times or []]
+        if self.stats is not None:
+            draw_service_times = [self.stats.timed("sampling", draw) for draw in draw_service_times]
+        return [draw(total_customers).tolist() for draw in draw_service_times], [0.0] * total_customers
+
+    def _run_heap(self) -> None:
+        """Event loop equivalent to the SimPy processes for a multi-server queue.
+
+        The arrival times and every server's service times are drawn up front, in vectorized blocks, so the loop
+        itself only makes heap and queue operations. The only events are the arrivals and the departures, which
+        are kept in a heap. The waiting customers are kept in a deque, list or heap depending on the discipline,
+        instead of SimPy's sorted request queue. Every server takes its service times in the order of its own
+        stream, so both engines give identical results with the same variate block size.
+        """
+        draw_interarrival_times = self._draw_interarrival_times
+        if self.stats is not None:
+            draw_interarrival_times = self.stats.timed("sampling", draw_interarrival_times)
+        arrival_times = self._draw_arrival_times(draw_interarrival_times)
+        total_customers = len(arrival_times)
+        service_times, keys = self._draw_service_times_per_server(total_customers)
+        requirements = self._requirements
+        next_service = [0] * self.num_servers
+
+        server_ids = [-1] * total_customers
+        service_start_times = [math.nan] * total_customers
+        customer_service_times = [math.nan] * total_customers
+        queue_lengths = [0] * total_customers
+        departures: list[tuple[float, int, int]] = []  # (departure time, server id, customer id)
+        waiting_customers = waiting_queue(self.discipline)
+        free_ranks, server_order, server_ranks = self.server_ids, self.server_order, self.server_ranks
+        log_debug = self._log_debug
+
+        def start_service(customer_id: int, now: float) -> None:
+            server_id = server_order[heappop(free_ranks)]
+            if requirements is None:
+                service_time = service_times[server_id][next_service[server_id]]
+                next_service[server_id] += 1
+            else:
+                service_time = service_times[server_id][customer_id]
+            server_ids[customer_id] = server_id
+            service_start_times[customer_id] = now
+            customer_service_times[customer_id] = service_time
+            log_debug("%.4f: #%d starts service on server %d", now, customer_id, server_id)
+            heappush(departures, (now + service_time, server_id, customer_id))
+
+        # A departure at the time of an arrival is processed after it, as in SimPy; the last departures come after
+        # an arrival at infinity.
+        for customer_id, now in enumerate([*arrival_times.tolist(), math.inf]):
+            while departures and departures[0][0] < now:
+                departure_time, server_id, departing_id = heappop(departures)
+                log_debug("%.4f: #%d ends service on server %d", departure_time, departing_id, server_id)
+                heappush(free_ranks, server_ranks[server_id])
+                if waiting_customers:
+                    start_service(waiting_customers.pop(), departure_time)
+            if customer_id == total_customers:
+                break
+            log_debug("%.4f: #%d arrives", now, customer_id)
+            queue_lengths[customer_id] = len(waiting_customers)
+            if free_ranks:
+                start_service(customer_id, now)
+            else:
+                waiting_customers.push(keys[customer_id], customer_id)
+
+        self.customer_log.extend(
+            arrival_times, np.array(service_start_times), np.array(customer_service_times), np.array(server_ids)
+        )
+        if self.stats is not None:
+            self.stats.record_many("queue_length", queue_lengths)
+
+    def _draw_interarrival_times(self, size: int) -> np.ndarray:
+        if self._interarrival_times is not None:
+            return self._interarrival_times.draw_many(size)
+        return np.atleast_1d(self.interarrival_time_rv.rvs(size=size))
+
+    def _draw_service_times(self, size: int) -> np.ndarray:
+        if self._service_times is not None:
+            return self._service_times[0].draw_many(size)
+        return np.atleast_1d(self.service_time_rvs[0].rvs(size=size))
+
+    def _run_lindley(self) -> None:
+        """Single-server FIFO queue computed with the Lindley recursion instead of event scheduling.
+
+        With `S` the service times and `C` their cumulative sums, the departure times are
+        `D_i = max(A_i, D_{i-1}) + S_i = C_i + max_{j <= i} (A_j - C_{j-1})`, a running maximum over arrays.
+        The draws and the arrival times match the event-driven engines; the other times agree up to rounding.
+        """
+        draw_interarrival_times = self._draw_interarrival_times
+        draw_service_times = self._draw_service_times
+        if self.stats is not None:
+            draw_interarrival_times = self.stats.timed("sampling", draw_interarrival_times)
+            draw_service_times = self.stats.timed("sampling", draw_service_times)
+
+        arrival_times = self._draw_arrival_times(draw_interarrival_times)
+        service_times = draw_service_times(len(arrival_times))
+        cumulative_service_times = np.cumsum(service_times)
+        departure_times = cumulative_service_times + np.maximum.accumulate(
+            arrival_times - (cumulative_service_times - service_times)
+        )
+        service_start_times = departure_times - service_times
+        self.customer_log.extend(arrival_times, service_start_times, service_times, server_ids=0)
+        if self.stats is not None:
+            # The customers waiting at an arrival are the earlier ones that have not started service yet.
+            started = np.searchsorted(service_start_times, arrival_times, side="right")
+            queue_lengths = np.arange(len(arrival_times)) - np.minimum(started, np.arange(len(arrival_times)))
+            self.stats.record_many("queue_length", queue_lengths.tolist())
 
     def summary(self) -> tuple[int, float, float, dict[int, int]]:
-        total_customers = len(self.customers)
-        end_time = max(c.departure_time for c in self.customers) if total_customers > 0 else 0.0
+        log = self.customer_log
+        total_customers = len(log)
+        departure_times = log.departure_times
+        end_time = float(departure_times.max()) if total_customers > 0 else 0.0
         average_spent_time = (
-            np.mean([c.departure_time - c.arrival_time for c in self.customers]) if total_customers > 0 else 0.0
+            float(np.mean(departure_times - log.arrival_times[:total_customers])) if total_customers > 0 else 0.0
         )
-        customers_per_server = [0 for _ in range(self.num_servers)]
-        for customer in self.customers:
-            customers_per_server[customer.server_id] += 1
-        logger.info(f"Total customers served: {total_customers}")
-        logger.info(f"End of service time: {end_time:.2f}")
-        logger.info(f"Average spent time: {average_spent_time:.2f}")
-        logger.info(f"Customers per server: {customers_per_server}")
+        # Customers who never reached a server have the id -1 and are not counted for any server.
+        server_ids = log.server_ids[:total_customers]
+        customers_per_server = np.bincount(server_ids[server_ids >= 0], minlength=self.num_servers).tolist()
+        logger.info("Total customers served: %d", total_customers)
+        logger.info("End of service time: %.2f", end_time)
+        logger.info("Average spent time: %.2f", average_spent_time)
+        logger.info("Customers per server: %s", customers_per_server)
 
         return total_customers, end_time, average_spent_time, customers_per_server  # type: ignore  # noqa: PGH003
 
@@ -135,21 +481,82 @@ def run_single_simulation(
     arrival_end_time: float,
     interarrival_time_rv: stats.rv_continuous,
     service_time_rvs: list[stats.rv_continuous],
+    engine: str = "simpy",
+    variate_block_size: int | None = None,
+    trace_dir: Path | None = None,
+    stats: InstrumentationStats | None = None,
+    discipline: str = "fifo",
+    server_selection: str = "lowest-id",
 ):
-    rng = np.random.default_rng(seed)
-    interarrival_time_rv.random_state = rng
-    for rv in service_time_rvs:
-        rv.random_state = rng
-
     server_system = ServerSystem(
         arrival_end_time=arrival_end_time,
         interarrival_time_rv=interarrival_time_rv,
         service_time_rvs=service_time_rvs,
+        engine=engine,
+        variate_block_size=variate_block_size,
+        stats=stats,
+        discipline=discipline,
+        server_selection=server_selection,
     )
+    if server_system.variate_block_size is None:
+        # Unbuffered variates come from the distributions' own generator, shared by all of them.
+        rng = np.random.default_rng(seed)
+        interarrival_time_rv.random_state = rng
+        for rv in service_time_rvs:
+            rv.random_state = rng
     server_system.run(seed=seed)
+    if trace_dir is not None:
+        log = server_system.customer_log
+        write_trace(
+            trace_dir,
+            seed,
+            log.arrival_times[: log.size],
+            log.service_start_times[: log.size],
+            log.service_times[: log.size],
+            log.server_ids[: log.size],
+        )
     return server_system.summary()
 
 
+_worker_state: dict = {}
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:  # Python < 3.13
+        return SharedMemory(name=name)
+
+
+def _initialize_worker(shared_memory_name: str, shape: tuple[int, int], simulation_kwargs: dict) -> None:
+    """Attach the shared result matrix and keep the (once pickled) distributions of the replications.
+
+    The per-replication logs of the workers are silenced; the parent reports the aggregated results.
+    """
+    logger.setLevel(logging.WARNING)
+    shared_memory = _attach_shared_memory(shared_memory_name)
+    _worker_state["shared_memory"] = shared_memory
+    _worker_state["results"] = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf)
+    _worker_state["simulation_kwargs"] = simulation_kwargs
+
+
+def run_simulation_chunk(seeds: range, instrument: bool = False) -> InstrumentationStats | None:
+    """Run a contiguous block of replications in a worker and write their metrics into the shared matrix.
+
+    Row `seed` receives the total customers, the end time, the average spent time and the customers per server.
+    With `instrument`, the stats of the block's replications are returned.
+    """
+    results = _worker_state["results"]
+    stats = InstrumentationStats() if instrument else None
+    for seed in seeds:
+        total_customers, end_time, average_spent_time, customers_per_server = run_single_simulation(
+            seed, **_worker_state["simulation_kwargs"], stats=stats
+        )
+        results[seed, :3] = total_customers, end_time, average_spent_time
+        results[seed, 3:] = customers_per_server
+    return stats
+
+
 class Simulation:
     def __init__(
         self,
@@ -157,11 +564,56 @@ class Simulation:
         arrival_end_time: float,
         interarrival_time_rv: stats.rv_continuous,
         service_time_rvs: list[stats.rv_continuous],
+        engine: str = "simpy",
+        variate_block_size: int | None = None,
+        relative_precision: float | None = None,
+        confidence: float = 0.95,
+        wave_size: int = 100,
+        chunk_size: int | None = None,
+        trace_dir: Path | None = None,
+        control_variate: bool = False,
+        instrument: bool = False,
+        discipline: str = "fifo",
+        server_selection: str = "lowest-id",
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: int = 1000,
     ):
+        """Run the replications of a server system.
+
+        Without `relative_precision`, exactly `number_of_simulations` replications are run. With it, replications
+        are run in waves of `wave_size` until the confidence interval half-width of every metric reported by
+        `summary` is within `relative_precision` times its mean, with `number_of_simulations` as the cap.
+
+        Each worker process receives the distributions once, runs blocks of `chunk_size` consecutive seeds and
+        writes the metrics into a shared-memory matrix with one row per replication (see `results`).
+        With `trace_dir`, the workers also write every replication's customer records there (see `traces`).
+        With `control_variate`, `summary` also reports the control-variate estimates (see `control_variate_estimates`).
+        With `instrument`, the replications are instrumented and their stats are merged into `instrumentation_stats`.
+        `discipline` and `server_selection` are the dispatch policy of every replication, see `ServerSystem`.
+        With `checkpoint_path`, the replications are run in waves of `wave_size` and the rows recorded since the
+        last checkpoint are saved about every `checkpoint_interval` replications (see `_save_checkpoint`). If the
+        file exists, the simulation continues after its last saved wave instead of starting over.
+        """
         self.number_of_simulations = number_of_simulations
         self.arrival_end_time = arrival_end_time
         self.interarrival_time_rv = interarrival_time_rv
         self.service_time_rvs = service_time_rvs
+        self.engine = engine
+        self.variate_block_size = variate_block_size
+        self.relative_precision = relative_precision
+        self.confidence = confidence
+        self.wave_size = wave_size
+        self.chunk_size = chunk_size
+        self.trace_dir = trace_dir
+        self.control_variate = control_variate
+        self.instrumentation_stats = InstrumentationStats() if instrument else None
+        self.discipline = discipline
+        self.server_selection = server_selection
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpoint_shards: list[list[int]] = []
+        self.results = np.empty((0, 3 + len(service_time_rvs)))
+        self.statistics = RunningStatistics(3 + len(service_time_rvs))
         self.total_customers_per_simulation = []
         self.end_times_per_simulation = []
         self.average_spent_times_per_simulation = []
@@ -171,27 +623,182 @@ class Simulation:
 
     def run(self):
         logger.info(f"Starting {self.number_of_simulations} simulations...")
-        logger.disabled = True
-
-        with ProcessPoolExecutor() as executor:
-            results = list(
-                executor.map(
-                    run_single_simulation,
-                    range(self.number_of_simulations),
-                    [self.arrival_end_time] * self.number_of_simulations,
-                    [self.interarrival_time_rv] * self.number_of_simulations,
-                    [self.service_time_rvs] * self.number_of_simulations,
-                )
-            )
 
-        for total_customers, end_time, average_spent_time, customers_per_server in results:
-            self.total_customers_per_simulation.append(total_customers)
-            self.end_times_per_simulation.append(end_time)
-            self.average_spent_times_per_simulation.append(average_spent_time)
-            self.customers_per_server_per_simulation.append(customers_per_server)
+        shape = (self.number_of_simulations, 3 + len(self.service_time_rvs))
+        shared_memory = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * np.dtype(np.float64).itemsize))
+        try:
+            self._run_pool(shared_memory, shape)
+        finally:
+            shared_memory.close()
+            shared_memory.unlink()
+
+        logger.info(f"Completed {len(self.total_customers_per_simulation)} simulations.")
+
+    def _run_pool(self, shared_memory: SharedMemory, shape: tuple[int, int]) -> None:
+        simulation_kwargs = {
+            "arrival_end_time": self.arrival_end_time,
+            "interarrival_time_rv": self.interarrival_time_rv,
+            "service_time_rvs": self.service_time_rvs,
+            "engine": self.engine,
+            "variate_block_size": self.variate_block_size,
+            "trace_dir": self.trace_dir,
+            "discipline": self.discipline,
+            "server_selection": self.server_selection,
+        }
+        results = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf)
+        try:
+            if self.checkpoint_path is not None and self.checkpoint_path.exists():
+                self._load_checkpoint(self.checkpoint_path, results)
+            with ProcessPoolExecutor(
+                initializer=_initialize_worker, initargs=(shared_memory.name, shape, simulation_kwargs)
+            ) as executor:
+                if self.relative_precision is None and self.checkpoint_path is None:
+                    self._collect(self._submit_chunks(executor, range(self.number_of_simulations)))
+                    self._record_block(results)
+                else:
+                    self._run_waves(executor, results)
+            self.results = results[: len(self.total_customers_per_simulation)].copy()
+        finally:
+            # The shared memory can only be closed once no array refers to its buffer.
+            del results
+
+    def _submit_chunks(self, executor: ProcessPoolExecutor, seeds: range) -> list[Future]:
+        chunk_size = self.chunk_size or max(1, math.ceil(len(seeds) / (4 * (os.cpu_count() or 1))))
+        return [
+            executor.submit(
+                run_simulation_chunk, seeds[start : start + chunk_size], self.instrumentation_stats is not None
+            )
+            for start in range(0, len(seeds), chunk_size)
+        ]
+
+    def _collect(self, futures: list[Future]) -> None:
+        for future in futures:
+            chunk_stats = future.result()
+            if self.instrumentation_stats is not None and chunk_stats is not None:
+                self.instrumentation_stats.merge(chunk_stats)
+
+    def _run_waves(self, executor: ProcessPoolExecutor, results: np.ndarray) -> None:
+        """Run the remaining replications in waves of `wave_size` and record the waves in order.
+
+        Later waves are submitted before the earlier ones are recorded, so the pool does not idle at the wave
+        boundaries: all of them at once without `relative_precision`, otherwise one wave ahead, which is dropped if
+        the precision is reached first. Either way the recorded waves, and thus the results, do not depend on
+        the timing of the workers.
+        """
+        if self.relative_precision is not None and self._precision_reached():
+            return
+        recorded = checkpointed = len(self.total_customers_per_simulation)
+        waves = deque(
+            range(start, min(start + self.wave_size, self.number_of_simulations))
+            for start in range(recorded, self.number_of_simulations, self.wave_size)
+        )
+        waves_ahead = len(waves) if self.relative_precision is None else 2
+        running: deque[tuple[range, list[Future]]] = deque()
+        while waves or running:
+            while waves and len(running) < waves_ahead:
+                seeds = waves.popleft()
+                running.append((seeds, self._submit_chunks(executor, seeds)))
+            seeds, futures = running.popleft()
+            self._collect(futures)
+            self._record_block(results[seeds.start : seeds.stop])
+            recorded = seeds.stop
+            done = not (waves or running) or (self.relative_precision is not None and self._precision_reached())
+            if self.checkpoint_path is not None and (done or recorded - checkpointed >= self.checkpoint_interval):
+                self._save_checkpoint(self.checkpoint_path, results, checkpointed, recorded)
+                checkpointed = recorded
+            if done:
+                break
+        for _, futures in running:
+            for future in futures:
+                future.cancel()
+
+    def _record_block(self, block: np.ndarray) -> None:
+        self.total_customers_per_simulation.extend(block[:, 0].astype(int).tolist())
+        self.end_times_per_simulation.extend(block[:, 1].tolist())
+        self.average_spent_times_per_simulation.extend(block[:, 2].tolist())
+        self.customers_per_server_per_simulation.extend(block[:, 3:].astype(int).tolist())
+        self.statistics.update_batch(block)
+
+    def _checkpoint_configuration(self) -> dict:
+        """The settings a checkpoint's results depend on; a checkpoint of other settings is not resumed."""
+        return {
+            "arrival_end_time": self.arrival_end_time,
+            "distributions": [
+                [rv.dist.name, [float(arg) for arg in rv.args], {key: float(value) for key, value in rv.kwds.items()}]
+                for rv in [self.interarrival_time_rv, *self.service_time_rvs]
+            ],
+            "engine": self.engine,
+            "variate_block_size": self.variate_block_size,
+            "discipline": self.discipline,
+            "server_selection": self.server_selection,
+            "wave_size": self.wave_size,
+        }
+
+    @staticmethod
+    def _shard_path(path: Path, start: int, stop: int) -> Path:
+        return path.with_name(f"{path.stem}.{start:09d}-{stop:09d}.npy")
+
+    def _save_checkpoint(self, path: Path, results: np.ndarray, start: int, stop: int) -> None:
+        """Save the rows `start:stop` to a shard file of their own, then list it in the checkpoint at `path`.
+
+        The earlier rows are already in earlier shards, so every row is written once. A run killed between the two
+        writes leaves an unlisted shard behind, which the next checkpoint of these rows overwrites.
+        """
+        save_array(self._shard_path(path, start, stop), results[start:stop])
+        self._checkpoint_shards.append([start, stop])
+        save_checkpoint(
+            path, {}, {"configuration": self._checkpoint_configuration(), "shards": self._checkpoint_shards}
+        )
 
-        logger.disabled = False
-        logger.info(f"Completed {self.number_of_simulations} simulations.")
+    def _load_checkpoint(self, path: Path, results: np.ndarray) -> None:
+        """Copy the saved rows into `results` and replay them wave by wave, as they were recorded before saving."""
+        _, metadata = load_checkpoint(path)
+        if metadata["configuration"] != self._checkpoint_configuration():
+            raise ValueError(f"The checkpoint {path} was saved by a simulation with other settings.")  # noqa: TRY003
+        saved = 0
+        for start, stop in metadata["shards"]:
+            if start != saved or stop > self.number_of_simulations:
+                break
+            results[start:stop] = np.load(self._shard_path(path, start, stop))
+            self._checkpoint_shards.append([start, stop])
+            saved = stop
+        for start in range(0, saved, self.wave_size):
+            self._record_block(results[start : min(start + self.wave_size, saved)])
+        logger.info(f"Resumed {saved} simulations from {path}.")
+
+    def _precision_reached(self) -> bool:
+        if self.statistics.count < 2:
+            return False
+        half_widths = self.statistics.half_width(self.confidence)
+        return bool(np.all(half_widths <= self.relative_precision * np.abs(self.statistics.mean)))
+
+    def control_variate_estimates(
+        self, expected_customers: float | None = None
+    ) -> dict[str, tuple[float, float, float]]:
+        """Estimate the mean end time and average spent time with the number of customers as control variate.
+
+        Each metric `Y` is replaced by `Y - beta * (N - E[N])`, where `N` is the number of customers of the
+        replication and `beta` the fitted regression coefficient. `expected_customers` defaults to the arrival end
+        time divided by the mean interarrival time, which is exact for Poisson arrivals.
+        Returns `(estimate, half-width, variance-reduction factor)` per metric.
+        """
+        if expected_customers is None:
+            expected_customers = self.arrival_end_time / self.interarrival_time_rv.mean()
+        customers = self.results[:, 0]
+        z = critical_value(self.confidence)
+        estimates = {}
+        for name, column in [("end_time", 1), ("average_spent_time", 2)]:
+            metric = self.results[:, column]
+            covariance = np.cov(metric, customers)
+            beta = covariance[0, 1] / covariance[1, 1]
+            controlled = metric - beta * (customers - expected_customers)
+            variance = np.var(controlled, ddof=1)
+            estimates[name] = (
+                float(np.mean(controlled)),
+                float(z * np.sqrt(variance / len(controlled))),
+                float(covariance[0, 0] / variance),
+            )
+        return estimates
 
     def summary(self):
         avg_total_customers = np.mean(self.total_customers_per_simulation)
@@ -214,9 +821,46 @@ class Simulation:
             logger.info(
                 f"Average number of customers served on server {i}: {avg:.2f} (std: {std:.2f}), ratio: {avg / avg_total_customers:.4f}"
             )
+        if self.control_variate:
+            for name, (estimate, half_width, factor) in self.control_variate_estimates().items():
+                logger.info(
+                    f"Control-variate estimate of {name}: {estimate:.4f} ± {half_width:.4f} "
+                    + f"(variance reduction factor: {factor:.2f})"
+                )
         logger.info("Simulation completed.")
 
 
+def compare_simulations(
+    simulation: Simulation, other: Simulation, confidence: float = 0.95
+) -> dict[str, tuple[float, float, float]]:
+    """Estimate the differences of the shared metrics of two configurations replicated with the same seeds.
+
+    With variate buffers every seed drives its own streams, so both configurations see common random numbers and
+    their metrics are positively correlated. Returns `(difference, half-width, variance-reduction factor)` per
+    metric, where the factor compares the variance of the paired differences to that of independent runs.
+    """
+    replications = min(len(simulation.results), len(other.results))
+    z = critical_value(confidence)
+    comparison = {}
+    for name, column in [("total_customers", 0), ("end_time", 1), ("average_spent_time", 2)]:
+        first, second = simulation.results[:replications, column], other.results[:replications, column]
+        variance = np.var(first - second, ddof=1)
+        comparison[name] = (
+            float(np.mean(first - second)),
+            float(z * np.sqrt(variance / replications)),
+            float((np.var(first, ddof=1) + np.var(second, ddof=1)) / variance),
+        )
+    return comparison
+
+
+def exercise_distributions(exercise: str) -> tuple[stats.rv_continuous, list[stats.rv_continuous]]:
+    import scipy.stats as stats
+
+    if exercise == "1":
+        return stats.expon(scale=1 / 10), [stats.gamma(a=3, scale=1 / 40)]
+    return stats.expon(scale=1 / 6), [stats.expon(scale=1 / 4), stats.expon(scale=1 / 3)]
+
+
 @click.command()
 @click.option(
     "--exercise",
@@ -230,21 +874,144 @@ class Simulation:
     default=100,
     help="Set the number of simulations to run (default: 100).",
 )
-def main(exercise: str, number_of_simulations: int):
-    if exercise == "1":
-        interarrival_time_rv = stats.expon(scale=1 / 10)
-        service_time_rvs = [stats.gamma(a=3, scale=1 / 40)]
-    elif exercise == "2":
-        interarrival_time_rv = stats.expon(scale=1 / 6)
-        service_time_rvs = [stats.expon(scale=1 / 4), stats.expon(scale=1 / 3)]
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES, case_sensitive=False),
+    default="simpy",
+    help="Simulation engine: the SimPy process model, the lean heap-based event loop, or 'fast', which uses the "
+    "Lindley recursion for a single server and the heap engine otherwise (default: simpy).",
+)
+@click.option(
+    "--discipline",
+    type=click.Choice(DISCIPLINES, case_sensitive=False),
+    default="fifo",
+    help="Order in which waiting customers are served; 'shortest-service' knows the service times on arrival "
+    + "(default: fifo).",
+)
+@click.option(
+    "--server-selection",
+    type=click.Choice(SERVER_SELECTIONS, case_sensitive=False),
+    default="lowest-id",
+    help="Free server a customer takes: the one with the lowest id or the lowest mean service time "
+    + "(default: lowest-id).",
+)
+@click.option(
+    "--variate-block-size",
+    type=int,
+    default=None,
+    help="Draw the interarrival and service times in blocks of this size, on independent streams per seed "
+    + "(default: 256 for the heap and fast engines, one rvs() call per variate for simpy).",
+)
+@click.option(
+    "--relative-precision",
+    type=float,
+    default=None,
+    help="Stop as soon as every confidence interval half-width is within this fraction of its mean "
+    + "(e.g. 0.01 for ±1%); --number-of-simulations is then the cap.",
+)
+@click.option("--confidence", type=float, default=0.95, help="Confidence level for --relative-precision.")
+@click.option(
+    "--trace-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Write every replication's customer records to <trace-dir>/seed=<seed>.npy.",
+)
+@click.option(
+    "--control-variate",
+    is_flag=True,
+    help="Also report control-variate estimates, with the number of customers as the control.",
+)
+@click.option(
+    "--compare-with",
+    type=click.Choice(["1", "2"], case_sensitive=False),
+    default=None,
+    help="Also run this exercise on the same seeds and report the differences (common random numbers).",
+)
+@click.option(
+    "--instrument",
+    is_flag=True,
+    help="Report the time spent sampling, logging and in the event loop, and the event and queue-length counts.",
+)
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Checkpoint the results to this file (and shards next to it), and continue from it if it exists.",
+)
+@click.option(
+    "--checkpoint-interval",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="Number of simulations between checkpoints, rounded up to whole waves of 100 (default: 1000).",
+)
+@click.option(
+    "--log-level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING"], case_sensitive=False),
+    default="INFO",
+    help="DEBUG also logs every event of the replications run in this process (default: INFO).",
+)
+def main(
+    exercise: str,
+    number_of_simulations: int,
+    engine: str,
+    discipline: str,
+    server_selection: str,
+    variate_block_size: int | None,
+    relative_precision: float | None,
+    confidence: float,
+    trace_dir: Path | None,
+    control_variate: bool,
+    compare_with: str | None,
+    instrument: bool,
+    checkpoint: Path | None,
+    checkpoint_interval: int,
+    log_level: str,
+):
+    logging.basicConfig(level=log_level.upper(), format="%(levelname)s - %(message)s")
+    if compare_with is not None and variate_block_size is None:
+        # Common random numbers need every stream to depend on the seed only.
+        variate_block_size = 1024
+    interarrival_time_rv, service_time_rvs = exercise_distributions(exercise)
 
     simulation = Simulation(
         number_of_simulations=number_of_simulations,
         arrival_end_time=9.0,
-        interarrival_time_rv=interarrival_time_rv,  # type: ignore  # noqa: PGH003
-        service_time_rvs=service_time_rvs,  # type: ignore  # noqa: PGH003
+        interarrival_time_rv=interarrival_time_rv,
+        service_time_rvs=service_time_rvs,
+        engine=engine,
+        variate_block_size=variate_block_size,
+        relative_precision=relative_precision,
+        confidence=confidence,
+        trace_dir=trace_dir,
+        control_variate=control_variate,
+        instrument=instrument,
+        discipline=discipline,
+        server_selection=server_selection,
+        checkpoint_path=checkpoint,
+        checkpoint_interval=checkpoint_interval,
     )
     simulation.summary()
+    if simulation.instrumentation_stats is not None:
+        for line in simulation.instrumentation_stats.report().splitlines():
+            logger.info(line)
+
+    if compare_with is not None:
+        interarrival_time_rv, service_time_rvs = exercise_distributions(compare_with)
+        other = Simulation(
+            number_of_simulations=len(simulation.results),
+            arrival_end_time=9.0,
+            interarrival_time_rv=interarrival_time_rv,
+            service_time_rvs=service_time_rvs,
+            engine=engine,
+            variate_block_size=variate_block_size,
+            discipline=discipline,
+            server_selection=server_selection,
+        )
+        for name, (difference, half_width, factor) in compare_simulations(simulation, other, confidence).items():
+            logger.info(
+                f"Difference of {name} (exercise {exercise} - exercise {compare_with}): {difference:.4f} "
+                + f"± {half_width:.4f} (variance reduction factor: {factor:.2f})"
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+import numpy as np
+
+from simulation.demo_5.server_system import ENGINES, run_single_simulation
+from simulation.running_statistics import RunningStatistics, critical_value
+
+if TYPE_CHECKING:
+    import scipy.stats as stats
+
+logger = logging.getLogger(__name__)
+
+_DISTRIBUTION_PATTERN = re.compile(r"\s*(\w+)\s*\((.*)\)\s*")
+METRICS = ["total_customers", "end_time", "average_spent_time"]
+RESULT_COLUMNS = [
+    "key",
+    "interarrival",
+    "services",
+    "arrival_end_time",
+    "replications",
+    "engine",
+    "variate_block_size",
+    "confidence",
+    *(f"{metric}_{statistic}" for metric in METRICS for statistic in ["mean", "std", "half_width"]),
+    "customers_per_server_mean",
+]
+
+
+@cache
+def parse_distribution(spec: str) -> stats.rv_continuous:
+    """Freeze a SciPy distribution written as `name(param=value, ...)`, e.g. `gamma(a=3, scale=0.025)`."""
+    import scipy.stats as stats
+
+    match = _DISTRIBUTION_PATTERN.fullmatch(spec)
+    if match is None or not isinstance(getattr(stats, match.group(1), None), stats.rv_continuous):
+        raise ValueError(f"Invalid distribution: {spec!r}, expected e.g. 'expon(scale=0.1)'.")  # noqa: TRY003
+    parameters = {}
+    for parameter in filter(None, (part.strip() for part in match.group(2).split(","))):
+        name, _, value = parameter.partition("=")
+        parameters[name.strip()] = float(value)
+    return getattr(stats, match.group(1))(**parameters)
+
+
+@dataclass(frozen=True)
+class Configuration:
+    """A server system to sweep over: the distributions are written as in `parse_distribution`."""
+
+    interarrival: str
+    services: tuple[str, ...]
+    arrival_end_time: float = 9.0
+
+    @property
+    def expected_customers(self) -> float:
+        return self.arrival_end_time / float(parse_distribution(self.interarrival).mean())
+
+    def key(self, replications: int, engine: str, variate_block_size: int | None, confidence: float = 0.95) -> str:
+        """Identifies the results of this configuration for the given run settings in the results table."""
+        settings = {
+            **asdict(self),
+            "replications": replications,
+            "engine": engine,
+            "block": variate_block_size,
+            "confidence": confidence,
+        }
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def grid(
+    arrival_rates: list[float], server_counts: list[int], services: list[str], arrival_end_time: float = 9.0
+) -> list[Configuration]:
+    """Every combination of an arrival rate (Poisson arrivals), a number of servers and a service distribution."""
+    return [
+        Configuration(f"expon(scale={1 / arrival_rate!r})", (service,) * server_count, arrival_end_time)
+        for arrival_rate, server_count, service in itertools.product(arrival_rates, server_counts, services)
+    ]
+
+
+def load_configurations(path: Path) -> list[Configuration]:
+    """Read configurations from a JSON list of objects with the fields of `Configuration`."""
+    return [
+        Configuration(item["interarrival"], tuple(item["services"]), item.get("arrival_end_time", 9.0))
+        for item in json.loads(path.read_text())
+    ]
+
+
+def _initialize_sweep_worker() -> None:
+    logging.getLogger("simulation.demo_5.server_system").setLevel(logging.WARNING)
+
+
+def run_sweep_chunk(
+    configuration: Configuration, seeds: range, engine: str, variate_block_size: int | None
+) -> np.ndarray:
+    """Run replications of one configuration and return a row of metrics per seed, as in `run_simulation_chunk`."""
+    interarrival_time_rv = parse_distribution(configuration.interarrival)
+    service_time_rvs = [parse_distribution(service) for service in configuration.services]
+    results = np.empty((len(seeds), 3 + len(service_time_rvs)))
+    for row, seed in enumerate(seeds):
+        total_customers, end_time, average_spent_time, customers_per_server = run_single_simulation(
+            seed,
+            configuration.arrival_end_time,
+            interarrival_time_rv,
+            service_time_rvs,
+            engine=engine,
+            variate_block_size=variate_block_size,
+        )
+        results[row, :3] = total_customers, end_time, average_spent_time
+        results[row, 3:] = customers_per_server
+    return results
+
+
+def _load_cached_keys(results_file: Path) -> set[str]:
+    if not results_file.exists():
+        return set()
+    content = results_file.read_bytes()
+    if content and not content.endswith(b"\n"):
+        with results_file.open("r+b") as f:
+            f.truncate(content.rfind(b"\n") + 1)
+    with results_file.open(newline="") as f:
+        return {row["key"] for row in csv.DictReader(f) if row.get("key")}
+
+
+def _result_row(
+    configuration: Configuration,
+    key: str,
+    replications: int,
+    engine: str,
+    variate_block_size: int | None,
+    statistics: RunningStatistics,
+    confidence: float = 0.95,
+) -> dict:
+    row = {
+        "key": key,
+        "interarrival": configuration.interarrival,
+        "services": ";".join(configuration.services),
+        "arrival_end_time": configuration.arrival_end_time,
+        "replications": replications,
+        "engine": engine,
+        "variate_block_size": variate_block_size,
+        "confidence": confidence,
+    }
+    z = critical_value(confidence)
+    for column, metric in enumerate(METRICS):
+        variance = statistics.variance[column]
+        row[f"{metric}_mean"] = statistics.mean[column]
+        row[f"{metric}_std"] = math.sqrt(variance)
+        row[f"{metric}_half_width"] = z * math.sqrt(variance / statistics.count)
+    row["customers_per_server_mean"] = ";".join(f"{mean:.4f}" for mean in statistics.mean[3:])
+    return row
+
+
+def run_sweep(
+    configurations: list[Configuration],
+    results_file: Path,
+    replications: int = 100,
+    engine: str = "fast",
+    variate_block_size: int | None = None,
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    confidence: float = 0.95,
+) -> Path:
+    """Replicate every configuration on one process pool and append a row of aggregates per configuration.
+
+    The (configuration, seed block) tasks are submitted most expensive first, judged by the expected number of
+    customers, so the long configurations do not end up last on an otherwise idle pool. A configuration's row is
+    written as soon as its last block is done. Configurations already in the results table (with the same
+    replications, engine, variate block size and confidence level) are skipped, so repeated or interrupted sweeps
+    only compute what is missing. The half-widths are those of the `confidence` level.
+    """
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    cached_keys = _load_cached_keys(results_file)
+    unique_configurations = list(dict.fromkeys(configurations))
+    pending = {}
+    for configuration in unique_configurations:
+        key = configuration.key(replications, engine, variate_block_size, confidence)
+        if key not in cached_keys:
+            pending[key] = configuration
+    logger.info(f"Sweeping {len(pending)} configurations, {len(unique_configurations) - len(pending)} cached.")
+
+    workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(replications * len(pending) / (4 * workers)))
+    tasks = sorted(
+        (
+            (key, range(start, min(start + chunk_size, replications)))
+            for key in pending
+            for start in range(0, replications, chunk_size)
+        ),
+        key=lambda task: -pending[task[0]].expected_customers * len(task[1]),
+    )
+    statistics = {key: RunningStatistics(3 + len(configuration.services)) for key, configuration in pending.items()}
+
+    write_header = not results_file.exists() or results_file.stat().st_size == 0
+    with (
+        results_file.open("a", newline="") as f,
+        ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_sweep_worker) as executor,
+    ):
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if write_header:
+            writer.writeheader()
+            f.flush()
+
+        futures: dict[Future, str] = {
+            executor.submit(run_sweep_chunk, pending[key], seeds, engine, variate_block_size): key
+            for key, seeds in tasks
+        }
+        running = set(futures)
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                statistics[key].update_batch(future.result())
+                if statistics[key].count == replications:
+                    writer.writerow(
+                        _result_row(
+                            pending[key], key, replications, engine, variate_block_size, statistics[key], confidence
+                        )
+                    )
+                    f.flush()
+                    configuration = pending[key]
+                    logger.info(
+                        f"  {configuration.interarrival} | {';'.join(configuration.services)}: "
+                        + f"{dict(zip(METRICS, statistics[key].mean[:3].round(4).tolist()))}"
+                    )
+    return results_file
+
+
+@click.command()
+@click.option("--arrival-rate", "arrival_rates", type=float, multiple=True, help="Poisson arrival rate (repeatable).")
+@click.option("--servers", "server_counts", type=int, multiple=True, help="Number of servers (repeatable).")
+@click.option(
+    "--service",
+    "services",
+    multiple=True,
+    help="Service time distribution of every server, e.g. 'gamma(a=3, scale=0.025)' (repeatable).",
+)
+@click.option(
+    "--config-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="JSON list of configurations with 'interarrival', 'services' and optionally 'arrival_end_time'.",
+)
+@click.option("--arrival-end-time", type=float, default=9.0, help="Arrival end time of the grid (default: 9.0).")
+@click.option("--replications", type=int, default=100, help="Replications per configuration (default: 100).")
+@click.option("--engine", type=click.Choice(ENGINES, case_sensitive=False), default="fast", help="Default: fast.")
+@click.option("--max-workers", type=int, default=None, help="Number of worker processes.")
+@click.option("--confidence", type=float, default=0.95, help="Confidence level of the half-widths (default: 0.95).")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path("sweep_results.csv"),
+    help="Results table; configurations already in it are not recomputed (default: sweep_results.csv).",
+)
+def main(
+    arrival_rates: tuple[float, ...],
+    server_counts: tuple[int, ...],
+    services: tuple[str, ...],
+    config_file: Path | None,
+    arrival_end_time: float,
+    replications: int,
+    engine: str,
+    max_workers: int | None,
+    confidence: float,
+    output: Path,
+) -> None:
+    logging.basicConfig(level="INFO", format="%(levelname)s - %(message)s")
+    configurations = load_configurations(config_file) if config_file is not None else []
+    if arrival_rates or server_counts or services:
+        configurations += grid(list(arrival_rates), list(server_counts) or [1], list(services), arrival_end_time)
+    if not configurations:
+        raise click.UsageError("Give a grid (--arrival-rate, --servers, --service) or a --config-file.")  # noqa: TRY003
+    run_sweep(configurations, output, replications, engine, max_workers=max_workers, confidence=confidence)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import re
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+TRACE_DTYPE = np.dtype([
+    ("arrival_time", np.float64),
+    ("service_start_time", np.float64),
+    ("service_time", np.float64),
+    ("server_id", np.int32),
+])
+_TRACE_FILE_PATTERN = re.compile(r"seed=(\d+)\.npy")
+
+
+def trace_path(trace_dir: Path, seed: int) -> Path:
+    return trace_dir / f"seed={seed}.npy"
+
+
+def write_trace(
+    trace_dir: Path,
+    seed: int,
+    arrival_times: np.ndarray,
+    service_start_times: np.ndarray,
+    service_times: np.ndarray,
+    server_ids: np.ndarray,
+) -> Path:
+    """Write the customer records of one replication to `<trace_dir>/seed=<seed>.npy`.
+
+    The file is written under a temporary name and renamed, so a partially written trace is never visible.
+    """
+    records = np.empty(len(arrival_times), dtype=TRACE_DTYPE)
+    records["arrival_time"] = arrival_times
+    records["service_start_time"] = service_start_times
+    records["service_time"] = service_times
+    records["server_id"] = server_ids
+
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    path = trace_path(trace_dir, seed)
+    temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with temporary_path.open("wb") as f:
+        np.save(f, records)
+    os.replace(temporary_path, path)
+    return path
+
+
+def load_trace(trace_dir: Path, seed: int) -> np.ndarray:
+    """Memory-map the trace of one replication; nothing is read until the records are accessed."""
+    return np.load(trace_path(trace_dir, seed), mmap_mode="r")  # type: ignore[no-any-return]
+
+
+def iter_traces(trace_dir: Path) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield `(seed, records)` for every trace in the directory, in seed order, one memory map at a time."""
+    seeds = sorted(
+        int(match.group(1)) for path in trace_dir.iterdir() if (match := _TRACE_FILE_PATTERN.fullmatch(path.name))
+    )
+    for seed in seeds:
+        yield seed, load_trace(trace_dir, seed)
@@ -0,0 +1,58 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import scipy.stats as stats
+
+
+class VariateBuffer:
+    """Hands out variates of a frozen distribution one at a time, drawing them in vectorized blocks.
+
+    NumPy generators produce the same numbers whether they are drawn one by one or in blocks, so the values
+    handed out are exactly those that repeated `rv.rvs(random_state=random_state)` calls would return.
+    """
+
+    def __init__(self, rv: "stats.rv_continuous", random_state: np.random.Generator, block_size: int = 1024):
+        if block_size < 1:
+            raise ValueError("Block size must be positive.")  # noqa: TRY003
+        self.rv = rv
+        self.random_state = random_state
+        self.block_size = block_size
+        self._block: list[float] = []
+        self._position = 0
+
+    def draw(self) -> float:
+        if self._position == len(self._block):
+            self._block = self.rv.rvs(size=self.block_size, random_state=self.random_state).tolist()
+            self._position = 0
+        value = self._block[self._position]
+        self._position += 1
+        return value
+
+    def draw_many(self, size: int) -> np.ndarray:
+        """Return the next `size` variates of the stream as an array."""
+        buffered = self._block[self._position : self._position + size]
+        self._position += len(buffered)
+        if len(buffered) == size:
+            return np.array(buffered)
+        fresh = self.rv.rvs(size=size - len(buffered), random_state=self.random_state)
+        return np.concatenate([np.array(buffered), np.atleast_1d(fresh)])
+
+
+def spawn_variate_buffers(
+    seed: int,
+    interarrival_time_rv: "stats.rv_continuous",
+    service_time_rvs: "list[stats.rv_continuous]",
+    block_size: int = 1024,
+) -> tuple[VariateBuffer, list[VariateBuffer]]:
+    """Create buffers for the interarrival times and each server's service times on independent streams.
+
+    The streams are spawned from `np.random.default_rng(seed)`, so every stream only depends on the seed and
+    not on how the draws of the other streams are interleaved during the simulation.
+    """
+    interarrival_stream, *service_streams = np.random.default_rng(seed).spawn(1 + len(service_time_rvs))
+    return (
+        VariateBuffer(interarrival_time_rv, interarrival_stream, block_size),
+        [VariateBuffer(rv, stream, block_size) for rv, stream in zip(service_time_rvs, service_streams)],
+    )
@@ -1,9 +1,15 @@
+from __future__ import annotations
+
 import itertools
 import json
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 
 import click
 import numpy as np
-from scipy.stats import norm
+
+from simulation.running_statistics import RunningStatistics, critical_value
 
 
 def simulate_once():
@@ -12,12 +18,66 @@ def simulate_once():
     return next(i + 1 for i, total in enumerate(cumulative) if total > 1)
 
 
-def estimate_e(n_runs=1000, confidence=0.95):
-    samples = [simulate_once() for _ in range(n_runs)]
-    mean = np.mean(samples)
-    var = np.var(samples, ddof=1)
+def simulate_batch(n_trials: int, rng: np.random.Generator, block_size: int = 8) -> np.ndarray:
+    """Vectorized `simulate_once`: the number of uniforms needed to exceed 1, for each of `n_trials` trials.
+
+    Every unfinished trial gets `block_size` more uniforms per round. Trials that do not cross 1 within a block
+    carry their partial sum over to the next round.
+    """
+    counts = np.zeros(n_trials, dtype=np.int64)
+    partial_sums = np.zeros(n_trials)
+    active = np.arange(n_trials)
+    drawn = 0
+    while active.size > 0:
+        cumulative = np.cumsum(rng.random((active.size, block_size)), axis=1)
+        cumulative += partial_sums[active, None]
+        crossed = cumulative > 1
+        finished = crossed[:, -1]
+        counts[active[finished]] = drawn + crossed[finished].argmax(axis=1) + 1
+        partial_sums[active[~finished]] = cumulative[~finished, -1]
+        active = active[~finished]
+        drawn += block_size
+    return counts
+
+
+def simulate_antithetic_batch(n_pairs: int, rng: np.random.Generator, block_size: int = 8) -> np.ndarray:
+    """Antithetic version of `simulate_batch`: column 0 counts the uniforms `U_i`, column 1 the `1 - U_i` needed to
+    exceed 1.
+
+    Both columns have the distribution of `simulate_once`, but they are negatively correlated, so the mean of a
+    pair varies less than the mean of two independent trials.
+    """
+    counts = np.zeros((n_pairs, 2), dtype=np.int64)
+    partial_sums = np.zeros((n_pairs, 2))
+    active = np.arange(n_pairs)
+    drawn = 0
+    while active.size > 0:
+        uniforms = rng.random((active.size, block_size))
+        cumulative = np.stack([np.cumsum(uniforms, axis=1), np.cumsum(1 - uniforms, axis=1)], axis=1)
+        cumulative += partial_sums[active, :, None]
+        crossed = cumulative > 1
+        pairs, sides = np.nonzero(crossed[:, :, -1] & (counts[active] == 0))
+        counts[active[pairs], sides] = drawn + crossed[pairs, sides].argmax(axis=1) + 1
+        partial_sums[active] = cumulative[:, :, -1]
+        active = active[(counts[active] == 0).any(axis=1)]
+        drawn += block_size
+    return counts
+
+
+def _sample_moments(n_trials: int, seed: np.random.SeedSequence, chunk_size: int) -> tuple[int, int]:
+    """Return the sum and the sum of squares of `n_trials` samples, drawn in chunks to bound the memory use."""
+    rng = np.random.default_rng(seed)
+    total = total_of_squares = 0
+    for start in range(0, n_trials, chunk_size):
+        samples = simulate_batch(min(chunk_size, n_trials - start), rng)
+        total += int(samples.sum())
+        total_of_squares += int((samples * samples).sum())
+    return total, total_of_squares
+
+
+def _summarize(mean: float, var: float, n_runs: int, confidence: float) -> dict:
     se = np.sqrt(var / n_runs)
-    z = norm.ppf(0.5 + confidence / 2)
+    z = critical_value(confidence)
     ci = (mean - z * se, mean + z * se)
     return {
         "estimate": round(mean, 6),
@@ -26,11 +86,144 @@ def estimate_e(n_runs=1000, confidence=0.95):
     }
 
 
+def estimate_e(n_runs=1000, confidence=0.95):
+    samples = [simulate_once() for _ in range(n_runs)]
+    mean = np.mean(samples)
+    var = np.var(samples, ddof=1)
+    return _summarize(mean, var, n_runs, confidence)
+
+
+def estimate_e_batched(
+    n_runs: int = 1000, confidence: float = 0.95, seed: int | None = None, workers: int = 1, chunk_size: int = 2**20
+) -> dict:
+    """Same estimate as `estimate_e`, from vectorized trials split across `workers` processes.
+
+    Every worker draws from its own stream spawned from `np.random.SeedSequence(seed)`. The samples are integers,
+    so only their exact sum and sum of squares are collected.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    trials_per_worker = [n_runs // workers + (i < n_runs % workers) for i in range(workers)]
+    chunk_sizes = [chunk_size] * workers
+    if workers == 1:
+        moments = list(map(_sample_moments, trials_per_worker, seeds, chunk_sizes))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            moments = list(executor.map(_sample_moments, trials_per_worker, seeds, chunk_sizes))
+
+    total = sum(m[0] for m in moments)
+    total_of_squares = sum(m[1] for m in moments)
+    mean = np.float64(total / n_runs) if n_runs > 0 else np.float64(np.nan)
+    # As with `np.var(..., ddof=1)` in `estimate_e`, the variance of fewer than two samples is NaN.
+    if n_runs < 2:
+        var = np.float64(np.nan)
+    else:
+        var = np.float64((n_runs * total_of_squares - total * total) / (n_runs * (n_runs - 1)))
+    return _summarize(mean, var, n_runs, confidence)
+
+
+def estimate_e_streaming(
+    n_runs: int | None = None,
+    confidence: float = 0.95,
+    target_half_width: float | None = None,
+    seed: int | None = None,
+    batch_size: int = 2**20,
+    progress: Callable[[dict], None] | None = None,
+    progress_interval: float = 1.0,
+) -> dict:
+    """Estimate e from batches of vectorized trials with constant-memory running moments.
+
+    Sampling stops after `n_runs` runs or, if `target_half_width` is given, as soon as the half-width of the
+    confidence interval drops to it, whichever comes first. `progress` receives the current result at most once
+    every `progress_interval` seconds.
+    """
+    if n_runs is None and target_half_width is None:
+        raise ValueError("Either the number of runs or the target half-width must be given.")  # noqa: TRY003
+    if target_half_width is not None and target_half_width <= 0:
+        raise ValueError(f"The target half-width must be positive, got {target_half_width}.")  # noqa: TRY003
+    rng = np.random.default_rng(seed)
+    statistics = RunningStatistics()
+    last_progress = time.perf_counter()
+
+    while n_runs is None or statistics.count < n_runs:
+        size = batch_size if n_runs is None else min(batch_size, n_runs - statistics.count)
+        statistics.update_batch(simulate_batch(size, rng))
+        if target_half_width is not None and statistics.half_width(confidence) <= target_half_width:
+            break
+        if progress is not None and time.perf_counter() - last_progress >= progress_interval:
+            progress(_summarize_running(statistics, confidence))
+            last_progress = time.perf_counter()
+
+    return _summarize_running(statistics, confidence)
+
+
+def _summarize_running(statistics: RunningStatistics, confidence: float) -> dict:
+    return {
+        **_summarize(float(statistics.mean), float(statistics.variance), statistics.count, confidence),
+        "n_runs": statistics.count,
+    }
+
+
+def estimate_e_antithetic(n_runs: int = 1000, confidence: float = 0.95, seed: int | None = None) -> dict:
+    """Estimate e from `n_runs // 2` antithetic pairs of trials.
+
+    `variance` is the variance of a single trial, as for the other estimators; `pair_variance` is that of a pair
+    mean, which the CI is based on. The variance-reduction factor is the variance of the mean of two independent
+    trials divided by `pair_variance`.
+    """
+    counts = simulate_antithetic_batch(n_runs // 2, np.random.default_rng(seed))
+    pair_means = counts.mean(axis=1)
+    pair_variance = np.var(pair_means, ddof=1)
+    variance = np.var(counts, ddof=1)
+    return {
+        **_summarize(np.mean(pair_means), pair_variance, len(pair_means), confidence),
+        "variance": round(variance, 6),
+        "pair_variance": round(pair_variance, 6),
+        "variance_reduction_factor": round(variance / 2 / pair_variance, 4),
+    }
+
+
 @click.command()
 @click.option("--n-runs", default=1000, help="Number of simulation runs.")
 @click.option("--confidence", default=0.95, help="Confidence level for interval.")
-def main(n_runs, confidence):
-    result = estimate_e(n_runs, confidence)
+@click.option("--batched", is_flag=True, help="Use the vectorized engine.")
+@click.option("--workers", default=1, help="Number of processes for the vectorized engine.")
+@click.option("--seed", default=None, type=int, help="Seed of the vectorized engine's streams.")
+@click.option("--antithetic", is_flag=True, help="Use antithetic pairs of trials and report the variance reduction.")
+@click.option("--stream", is_flag=True, help="Use constant-memory running moments and print progress lines.")
+@click.option(
+    "--target-half-width",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Stream until the confidence interval's half-width drops to this value (--n-runs is then ignored).",
+)
+def main(n_runs, confidence, batched, workers, seed, antithetic, stream, target_half_width):
+    if (stream or target_half_width is not None) and (batched or workers != 1):
+        raise click.UsageError(  # noqa: TRY003
+            "--stream and --target-half-width run in one process; drop --batched and --workers."
+        )
+    if antithetic and (stream or target_half_width is not None or batched or workers != 1):
+        raise click.UsageError(  # noqa: TRY003
+            "--antithetic runs a fixed number of pairs in one process; drop --stream, --target-half-width, "
+            "--batched and --workers."
+        )
+    if antithetic:
+        result = estimate_e_antithetic(n_runs, confidence, seed=seed)
+    elif stream or target_half_width is not None:
+
+        def print_progress(progress: dict) -> None:
+            click.echo(json.dumps(progress), err=True)
+
+        result = estimate_e_streaming(
+            None if target_half_width is not None else n_runs,
+            confidence,
+            target_half_width=target_half_width,
+            seed=seed,
+            progress=print_progress,
+        )
+    elif batched:
+        result = estimate_e_batched(n_runs, confidence, seed=seed, workers=workers)
+    else:
+        result = estimate_e(n_runs, confidence)
     print(json.dumps(result, indent=2))
 
 
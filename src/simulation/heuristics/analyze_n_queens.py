@@ -1,21 +1,118 @@
+from __future__ import annotations
+
+import csv
+import json
 import logging
+import math
+import random
 import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 
-from simulation.heuristics.n_queens import Chessboard, Solver, SolverStatus
+from simulation.heuristics.n_queens import BatchSolver, Chessboard, Solver, SolverStatus
+from simulation.instrumentation import InstrumentationStats
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
-def run_analysis(output_dir: Path, num_iterations: int = 100, runs_per_size: int = 10):
-    """Run N-Queens solver analysis for various sizes and save results."""
+# `time_seconds` is the time of the run alone. Batched runs leave it empty; the wall time of each batch is written
+# to a separate table with `BATCH_COLUMNS`, see `batch_times_file`.
+RESULT_COLUMNS = ["size", "seed", "solved", "steps", "time_seconds", "max_steps"]
+BATCH_COLUMNS = ["size", "runs", "max_steps", "time_seconds"]
+
+
+def batch_times_file(results_file: Path) -> Path:
+    """The table of batch wall times next to the results file of a batched analysis."""
+    return results_file.with_name(results_file.stem + ".batches.csv")
+
+
+def run_single_analysis(n: int, seed: int, max_steps: int, stats: InstrumentationStats | None = None) -> dict:
+    """Solve a single board of size `n` and return its row of the results table."""
+    start_time = time.perf_counter()
+    solved = False
+    steps = max_steps
+
+    # Each run draws from its own stream; seeding it like the global RNG keeps the results of earlier analyses.
+    rng = random.Random(seed)  # noqa: S311
+    try:
+        board = Chessboard.from_random_permutation(n, rng=rng)
+        solver = Solver(board, max_steps=max_steps, incremental=True, rng=rng, stats=stats)
+        solver.solve()
+        if solver.status == SolverStatus.SOLVED:
+            solved = True
+            steps = solver.current_step
+    except RuntimeError:
+        logger.warning(f"  Run of size {n} (seed={seed}) failed: Max steps reached.")
+        steps = max_steps
+
+    end_time = time.perf_counter()
+
+    return {
+        "size": n,
+        "seed": seed,
+        "solved": solved,
+        "steps": steps,
+        "time_seconds": end_time - start_time,
+        "max_steps": max_steps,
+    }
+
+
+def run_batch_analysis(n: int, seeds: list[int], max_steps: int) -> tuple[list[dict], float]:
+    """Solve the boards of `seeds` with one `BatchSolver` and return their rows of the results table and the
+    wall time of the batch.
+
+    The boards start from the same permutations as in `run_single_analysis`, but the moves differ. The runs are
+    not timed one by one, so their rows leave `time_seconds` empty.
+    """
+    if not seeds:
+        return [], 0.0
+    start_time = time.perf_counter()
+    boards = [Chessboard.from_random_permutation(n, rng=random.Random(seed)) for seed in seeds]  # noqa: S311
+    solver = BatchSolver(boards, max_steps=max_steps, rng=np.random.default_rng(seeds))
+    solver.solve()
+    batch_time = time.perf_counter() - start_time
+
+    rows = [
+        {
+            "size": n,
+            "seed": seed,
+            "solved": bool(solved),
+            "steps": int(steps) if solved else max_steps,
+            "time_seconds": None,
+            "max_steps": max_steps,
+        }
+        for seed, solved, steps in zip(seeds, solver.solved, solver.steps)
+    ]
+    return rows, batch_time
+
+
+def _run_instrumented_analysis(n: int, seed: int, max_steps: int) -> tuple[dict, InstrumentationStats]:
+    stats = InstrumentationStats()
+    return run_single_analysis(n, seed, max_steps, stats), stats
+
+
+def run_analysis(
+    output_dir: Path,
+    num_iterations: int = 100,
+    runs_per_size: int = 10,
+    stats: InstrumentationStats | None = None,
+    batched: bool = False,
+):
+    """Run N-Queens solver analysis for various sizes and save results.
+
+    With `stats`, the instrumentation of every run is collected into it. With `batched`, the runs of a size are
+    solved together by `run_batch_analysis` (which is not instrumented), and the batch times are saved to
+    `batch_times_file`.
+    """
+    import pandas as pd
+
     output_dir.mkdir(parents=True, exist_ok=True)
     results_file = output_dir / "n_queens_analysis.csv"
     results_list = []
+    batch_list = []
 
     logger.info(f"Starting N-Queens analysis. Results will be saved to {results_file}")
 
@@ -24,41 +121,21 @@ def run_analysis(output_dir: Path, num_iterations: int = 100, runs_per_size: int
         max_steps = n * 100
         solved_count = 0
         total_steps = 0
-        total_time = 0.0
 
         logger.info(f"Analyzing board size: {n} (k={k})")
 
-        for run in range(runs_per_size):
-            seed = k * runs_per_size + run
-            start_time = time.perf_counter()
-            solved = False
-            steps = max_steps
-
-            try:
-                board = Chessboard.from_random_permutation(n, seed=seed)
-                solver = Solver(board, max_steps=max_steps)
-                solver.solve()
-                if solver.status == SolverStatus.SOLVED:
-                    solved = True
-                    steps = solver.current_step
-                    solved_count += 1
-                    total_steps += steps
-            except RuntimeError:
-                logger.warning(f"  Run {run + 1}/{runs_per_size} (seed={seed}) failed: Max steps reached.")
-                steps = max_steps
-
-            end_time = time.perf_counter()
-            run_time = end_time - start_time
-            total_time += run_time
-
-            results_list.append({
-                "size": n,
-                "seed": seed,
-                "solved": solved,
-                "steps": steps,
-                "time_seconds": run_time,
-                "max_steps": max_steps,
-            })
+        seeds = [k * runs_per_size + run for run in range(runs_per_size)]
+        if batched:
+            results, total_time = run_batch_analysis(n, seeds, max_steps)
+            batch_list.append({"size": n, "runs": len(results), "max_steps": max_steps, "time_seconds": total_time})
+        else:
+            results = [run_single_analysis(n, seed, max_steps, stats) for seed in seeds]
+            total_time = sum(result["time_seconds"] for result in results)
+        for result in results:
+            if result["solved"]:
+                solved_count += 1
+                total_steps += result["steps"]
+            results_list.append(result)
 
         success_rate = (solved_count / runs_per_size) * 100 if runs_per_size > 0 else 0
         avg_steps = total_steps / solved_count if solved_count > 0 else float("nan")
@@ -69,8 +146,10 @@ def run_analysis(output_dir: Path, num_iterations: int = 100, runs_per_size: int
         )
 
     if results_list:
-        results_df = pd.DataFrame(results_list)
+        results_df = pd.DataFrame(results_list, columns=RESULT_COLUMNS)
         results_df.to_csv(results_file, index=False)
+        if batch_list:
+            pd.DataFrame(batch_list, columns=BATCH_COLUMNS).to_csv(batch_times_file(results_file), index=False)
         logger.info(f"Analysis complete. Results saved to {results_file}")
         return results_file
     else:
@@ -78,101 +157,350 @@ def run_analysis(output_dir: Path, num_iterations: int = 100, runs_per_size: int
         return None
 
 
+def _load_completed_runs(results_file: Path) -> set[tuple[int, int]]:
+    """Return the (size, seed) pairs already present in the results file.
+
+    A partially written last line (e.g. after a crash) is cut off, so that new rows can be appended safely.
+    A file with other columns than `RESULT_COLUMNS` is refused, as the appended rows would not match its header.
+    """
+    if not results_file.exists():
+        return set()
+
+    content = results_file.read_bytes()
+    if content and not content.endswith(b"\n"):
+        with results_file.open("r+b") as f:
+            f.truncate(content.rfind(b"\n") + 1)
+
+    completed_runs = set()
+    with results_file.open(newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is not None and reader.fieldnames != RESULT_COLUMNS:
+            raise ValueError(  # noqa: TRY003
+                f"{results_file} has the columns {reader.fieldnames}, expected {RESULT_COLUMNS}; "
+                "move it away to start a new analysis."
+            )
+        for row in reader:
+            try:
+                completed_runs.add((int(row["size"]), int(row["seed"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return completed_runs
+
+
+def _submit_analysis_tasks(
+    executor: ProcessPoolExecutor, tasks: list[tuple[int, int, int]], instrument: bool, batched: bool
+) -> list[Future]:
+    """Submit a run per `(size, seed, max_steps)` task or, with `batched`, a batch of the runs of every size."""
+    if not batched:
+        task = _run_instrumented_analysis if instrument else run_single_analysis
+        return [executor.submit(task, n, seed, max_steps) for n, seed, max_steps in tasks]
+    seeds_per_size: dict[tuple[int, int], list[int]] = {}
+    for n, seed, max_steps in tasks:
+        seeds_per_size.setdefault((n, max_steps), []).append(seed)
+    return [
+        executor.submit(run_batch_analysis, n, seeds, max_steps) for (n, max_steps), seeds in seeds_per_size.items()
+    ]
+
+
+def _append_batch_time(batch_file: Path, results: list[dict], batch_time: float) -> None:
+    size, max_steps = results[0]["size"], results[0]["max_steps"]
+    write_header = not batch_file.exists() or batch_file.stat().st_size == 0
+    with batch_file.open("a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=BATCH_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        writer.writerow({"size": size, "runs": len(results), "max_steps": max_steps, "time_seconds": batch_time})
+    logger.info(f"  Batch of {len(results)} runs of size {size}: time={batch_time:.4f}s")
+
+
+def run_analysis_parallel(
+    output_dir: Path,
+    num_iterations: int = 100,
+    runs_per_size: int = 10,
+    max_workers: int | None = None,
+    stats: InstrumentationStats | None = None,
+    batched: bool = False,
+) -> Path | None:
+    """Run the same analysis as `run_analysis` on a process pool.
+
+    Every result is appended to the CSV file as soon as it is available, and the (size, seed) pairs that are
+    already in the file are skipped, so an interrupted sweep can simply be restarted.
+    With `stats`, the workers instrument their runs and the stats are merged into it. With `batched`, every
+    worker task solves the missing runs of one size with `run_batch_analysis` (which is not instrumented), and
+    the batch times are appended to `batch_times_file`.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results_file = output_dir / "n_queens_analysis.csv"
+    completed_runs = _load_completed_runs(results_file)
+
+    tasks = []
+    for k in range(num_iterations):
+        n = 100 + k * 100
+        for run in range(runs_per_size):
+            seed = k * runs_per_size + run
+            if (n, seed) not in completed_runs:
+                tasks.append((n, seed, n * 100))
+
+    logger.info(
+        f"Starting parallel N-Queens analysis: {len(tasks)} runs to do, {len(completed_runs)} already in {results_file}"
+    )
+
+    write_header = not results_file.exists() or results_file.stat().st_size == 0
+    with results_file.open("a", newline="") as f, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if write_header:
+            writer.writeheader()
+            f.flush()
+
+        futures = _submit_analysis_tasks(executor, tasks, stats is not None, batched)
+        done_count = 0
+        for future in as_completed(futures):
+            if batched:
+                results, batch_time = future.result()
+                _append_batch_time(batch_times_file(results_file), results, batch_time)
+            elif stats is None:
+                results = [future.result()]
+            else:
+                result, run_stats = future.result()
+                stats.merge(run_stats)
+                results = [result]
+            writer.writerows(results)
+            f.flush()
+            for result in results:
+                done_count += 1
+                run_time = "" if batched else f", time={result['time_seconds']:.4f}s"
+                logger.info(
+                    f"  [{done_count}/{len(tasks)}] Size {result['size']} (seed={result['seed']}): "
+                    f"solved={result['solved']}, steps={result['steps']}{run_time}"
+                )
+
+    if not completed_runs and not tasks:
+        logger.warning("No results generated.")
+        return None
+
+    logger.info(f"Analysis complete. Results saved to {results_file}")
+    return results_file
+
+
+_AGGREGATES_TAIL_BYTES = 256
+
+
+@dataclass
+class SizeAggregate:
+    """Running sums of the runs of one board size, from which the plotted statistics are derived.
+
+    The time statistics only cover the runs timed one by one; batched runs count for the rest.
+    """
+
+    runs: int = 0
+    timed_runs: int = 0
+    time_sum: float = 0.0
+    time_sum_of_squares: float = 0.0
+    solved: int = 0
+    steps_sum: float = 0.0
+    steps_sum_of_squares: float = 0.0
+
+    def add(self, time_seconds: float | None, solved: bool, steps: int) -> None:
+        self.runs += 1
+        if time_seconds is not None:
+            self.timed_runs += 1
+            self.time_sum += time_seconds
+            self.time_sum_of_squares += time_seconds**2
+        if solved:
+            self.solved += 1
+            self.steps_sum += steps
+            self.steps_sum_of_squares += steps**2
+
+    @staticmethod
+    def _std(total: float, sum_of_squares: float, count: int) -> float:
+        """Sample standard deviation (0 below two samples, like the NaNs filled with 0 before)."""
+        if count < 2:
+            return 0.0
+        return math.sqrt(max(0.0, (sum_of_squares - total**2 / count) / (count - 1)))
+
+    def statistics(self) -> dict[str, float]:
+        return {
+            "avg_time": self.time_sum / self.timed_runs if self.timed_runs else 0.0,
+            "std_time": self._std(self.time_sum, self.time_sum_of_squares, self.timed_runs),
+            "success_rate": self.solved / self.runs * 100,
+            "avg_steps": self.steps_sum / self.solved if self.solved else 0.0,
+            "std_steps": self._std(self.steps_sum, self.steps_sum_of_squares, self.solved),
+        }
+
+
+class AnalysisAggregates:
+    """Per-size aggregates of a results CSV file that are updated from the rows appended since the last update.
+
+    The sums, the read offset and the data of the last rendered plots are kept in a JSON file next to the CSV,
+    so later calls, e.g. while the analysis is still appending rows, only read the new lines.
+    """
+
+    def __init__(self, csv_file_path: Path):
+        self.csv_file_path = csv_file_path
+        self.state_path = csv_file_path.with_name(csv_file_path.stem + ".aggregates.json")
+        self.offset = 0
+        self.tail = ""
+        self.fieldnames: list[str] | None = None
+        self.sizes: dict[int, SizeAggregate] = {}
+        self.rendered: dict[str, list] = {}
+        if self.state_path.exists():
+            state = json.loads(self.state_path.read_text())
+            self.offset = state["offset"]
+            self.tail = state["tail"]
+            self.fieldnames = state["fieldnames"]
+            self.sizes = {int(size): SizeAggregate(**aggregate) for size, aggregate in state["sizes"].items()}
+            self.rendered = state["rendered"]
+
+    def update(self) -> set[int]:
+        """Add the complete rows appended since the last update and return the sizes they belong to."""
+        with self.csv_file_path.open("rb") as f:
+            # The last line read before must still end at the offset, otherwise the file was rewritten.
+            tail_start = max(0, self.offset - _AGGREGATES_TAIL_BYTES)
+            f.seek(tail_start)
+            if f.read(self.offset - tail_start).decode("latin-1") != self.tail:
+                self.offset, self.tail, self.fieldnames, self.sizes, self.rendered = 0, "", None, {}, {}
+                f.seek(0)
+            content = f.read()
+        complete = content[: content.rfind(b"\n") + 1]
+        self.offset += len(complete)
+        if complete:
+            self.tail = (self.tail.encode("latin-1") + complete)[-_AGGREGATES_TAIL_BYTES:].decode("latin-1")
+
+        lines = complete.decode().splitlines()
+        if self.fieldnames is None and lines:
+            self.fieldnames = next(csv.reader(lines[:1]))
+            lines = lines[1:]
+        changed_sizes = set()
+        for row in csv.DictReader(lines, fieldnames=self.fieldnames):
+            size = int(row["size"])
+            time_seconds = float(row["time_seconds"]) if row["time_seconds"] else None
+            self.sizes.setdefault(size, SizeAggregate()).add(time_seconds, row["solved"] == "True", int(row["steps"]))
+            changed_sizes.add(size)
+        return changed_sizes
+
+    def statistics(self) -> dict[int, dict[str, float]]:
+        return {size: self.sizes[size].statistics() for size in sorted(self.sizes)}
+
+    def save(self) -> None:
+        state = {
+            "offset": self.offset,
+            "tail": self.tail,
+            "fieldnames": self.fieldnames,
+            "sizes": {size: asdict(aggregate) for size, aggregate in self.sizes.items()},
+            "rendered": self.rendered,
+        }
+        self.state_path.write_text(json.dumps(state))
+
+
 def plot_analysis_results(csv_file_path: Path, runs_per_size: int):
-    """Generate and save plots from the analysis results CSV file using OOP interface."""
+    """Generate and save plots from the analysis results CSV file using OOP interface.
+
+    The statistics come from `AnalysisAggregates`, so only the rows appended since the previous call are read,
+    and a plot is only rendered again if its data changed (or its file is missing).
+    """
     logger.info(f"Loading results from {csv_file_path} for plotting...")
     try:
-        df = pd.read_csv(csv_file_path)
+        aggregates = AnalysisAggregates(csv_file_path)
+        changed_sizes = aggregates.update()
     except Exception as e:
         logger.exception(f"Error loading CSV file {csv_file_path}: {e}")  # noqa: TRY401
         return
+    logger.info(f"{len(changed_sizes)} board sizes have new results.")
 
     output_dir = csv_file_path.parent
+    stats = aggregates.statistics()
+    sizes = list(stats)
+    plot_title_suffix = f" ({runs_per_size} runs per size)"
 
-    # Calculate statistics per size
-    grouped = df.groupby("size")
-    stats = grouped.agg(
-        avg_time=("time_seconds", "mean"),
-        std_time=("time_seconds", "std"),
-        success_rate=("solved", lambda x: x.mean() * 100),
-    )
+    def needs_rendering(path: Path, *columns: str) -> bool:
+        data = [plot_title_suffix, sizes, *([stats[size][column] for size in sizes] for column in columns)]
+        if aggregates.rendered.get(path.name) == data and path.exists():
+            return False
+        aggregates.rendered[path.name] = data
+        return True
 
-    # Calculate step statistics only for solved instances
-    solved_df = df[df["solved"]]
-    solved_grouped = solved_df.groupby("size")
-    step_stats = solved_grouped.agg(avg_steps=("steps", "mean"), std_steps=("steps", "std"))
+    time_plot_path = output_dir / "n_queens_avg_time.svg"
+    steps_plot_path = output_dir / "n_queens_avg_steps.svg"
+    success_plot_path = output_dir / "n_queens_success_rate.svg"
+    render_time_plot = needs_rendering(time_plot_path, "avg_time", "std_time")
+    render_steps_plot = needs_rendering(steps_plot_path, "avg_steps", "std_steps")
+    render_success_plot = needs_rendering(success_plot_path, "success_rate")
+    if not (render_time_plot or render_steps_plot or render_success_plot):
+        logger.info("Plots are up to date.")
+        aggregates.save()
+        return
 
-    # Merge stats
-    stats = stats.join(step_stats, how="left")
-    stats = stats.fillna(0)  # Fill NaN std devs or steps
+    import matplotlib.pyplot as plt
 
     # Plotting
     plt.style.use("seaborn-v0_8-paper")
 
-    plot_title_suffix = f" ({runs_per_size} runs per size)"
     fig_size = (6, 4)
     common_opts = {"fmt": "-o", "markersize": 4, "capsize": 3}
     grid_opts = {"linestyle": "--", "alpha": 0.6}
 
     # 1. Average Time vs Size
-    fig, ax = plt.subplots(figsize=fig_size)
-    ax.errorbar(
-        stats.index,
-        stats["avg_time"],
-        yerr=stats["std_time"],
-        label="Avg Time",
-        **common_opts,
-    )
-    ax.set_xlabel("Board Size (N)")
-    ax.set_ylabel("Average Time (seconds)")
-    ax.set_title("N-Queens: Average Time vs Board Size" + plot_title_suffix)
-    ax.legend()
-    ax.grid(True, **grid_opts)
-    time_plot_path = output_dir / "n_queens_avg_time.svg"
-    fig.savefig(time_plot_path, bbox_inches="tight")
-    logger.info(f"Saved time plot to {time_plot_path}")
-    plt.close(fig)
+    if render_time_plot:
+        fig, ax = plt.subplots(figsize=fig_size)
+        ax.errorbar(
+            sizes,
+            [stats[size]["avg_time"] for size in sizes],
+            yerr=[stats[size]["std_time"] for size in sizes],
+            label="Avg Time",
+            **common_opts,
+        )
+        ax.set_xlabel("Board Size (N)")
+        ax.set_ylabel("Average Time (seconds)")
+        ax.set_title("N-Queens: Average Time vs Board Size" + plot_title_suffix)
+        ax.legend()
+        ax.grid(True, **grid_opts)
+        fig.savefig(time_plot_path, bbox_inches="tight")
+        logger.info(f"Saved time plot to {time_plot_path}")
+        plt.close(fig)
 
     # 2. Average Steps (Solved) vs Size
-    fig, ax = plt.subplots(figsize=fig_size)
-    ax.errorbar(
-        stats.index,
-        stats["avg_steps"],
-        yerr=stats["std_steps"],
-        label="Avg Steps (Solved)",
-        **common_opts,
-    )
-    ax.set_xlabel("Board Size (N)")
-    ax.set_ylabel("Average Steps (solved instances)")
-    ax.set_title("N-Queens: Average Steps vs Board Size" + plot_title_suffix)
-    ax.legend()
-    ax.grid(True, **grid_opts)
-    steps_plot_path = output_dir / "n_queens_avg_steps.svg"
-    fig.savefig(steps_plot_path, bbox_inches="tight")
-    logger.info(f"Saved steps plot to {steps_plot_path}")
-    plt.close(fig)
+    if render_steps_plot:
+        fig, ax = plt.subplots(figsize=fig_size)
+        ax.errorbar(
+            sizes,
+            [stats[size]["avg_steps"] for size in sizes],
+            yerr=[stats[size]["std_steps"] for size in sizes],
+            label="Avg Steps (Solved)",
+            **common_opts,
+        )
+        ax.set_xlabel("Board Size (N)")
+        ax.set_ylabel("Average Steps (solved instances)")
+        ax.set_title("N-Queens: Average Steps vs Board Size" + plot_title_suffix)
+        ax.legend()
+        ax.grid(True, **grid_opts)
+        fig.savefig(steps_plot_path, bbox_inches="tight")
+        logger.info(f"Saved steps plot to {steps_plot_path}")
+        plt.close(fig)
 
     # 3. Success Rate vs Size
-    fig, ax = plt.subplots(figsize=fig_size)
-    ax.plot(stats.index, stats["success_rate"], "-o", markersize=4, label="Success Rate")
-    ax.set_xlabel("Board Size (N)")
-    ax.set_ylabel("Success Rate (%)")
-    ax.set_title("N-Queens: Success Rate vs Board Size" + plot_title_suffix)
-    ax.set_ylim(-5, 105)
-    ax.legend()
-    ax.grid(True, **grid_opts)
-    success_plot_path = output_dir / "n_queens_success_rate.svg"
-    fig.savefig(success_plot_path, bbox_inches="tight")
-    logger.info(f"Saved success rate plot to {success_plot_path}")
-    plt.close(fig)
+    if render_success_plot:
+        fig, ax = plt.subplots(figsize=fig_size)
+        ax.plot(sizes, [stats[size]["success_rate"] for size in sizes], "-o", markersize=4, label="Success Rate")
+        ax.set_xlabel("Board Size (N)")
+        ax.set_ylabel("Success Rate (%)")
+        ax.set_title("N-Queens: Success Rate vs Board Size" + plot_title_suffix)
+        ax.set_ylim(-5, 105)
+        ax.legend()
+        ax.grid(True, **grid_opts)
+        fig.savefig(success_plot_path, bbox_inches="tight")
+        logger.info(f"Saved success rate plot to {success_plot_path}")
+        plt.close(fig)
+
+    aggregates.save()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
     output_directory = Path(__file__).parent.parent.parent.parent / "results" / "n_queens"
     num_iterations_to_run = 100
     runs_per_size_to_run = 25
 
-    results_csv = run_analysis(
+    results_csv = run_analysis_parallel(
         output_directory,
         num_iterations=num_iterations_to_run,
         runs_per_size=runs_per_size_to_run,
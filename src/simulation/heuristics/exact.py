@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import numpy as np
+
+from simulation.heuristics.n_queens import Chessboard
+
+# Partial boards: (columns, diag1, diag2) bitmasks of the lines attacked in the next row.
+Masks = tuple[int, int, int]
+
+
+def _place(number_of_queens: int, masks: Masks, col: int) -> Masks:
+    """Place a queen in column `col` of the next row and shift the diagonals on to the row after it."""
+    cols, diag1, diag2 = masks
+    bit = 1 << col
+    return cols | bit, ((diag1 | bit) << 1) & ((1 << number_of_queens) - 1), (diag2 | bit) >> 1
+
+
+def find_solution(number_of_queens: int) -> Chessboard | None:
+    """Return the lexicographically first solution found by backtracking, or `None` if there is none.
+
+    The columns and both diagonal families are tracked as integer bitmasks, the same lines `Solver` counts
+    conflicts on, so the free columns of a row are a single expression. The search is exhaustive, so it can
+    prove that sizes like 2 and 3 have no solution, but it slows down quickly beyond 25 queens or so; large
+    boards are the job of `Solver`.
+    """
+    full = (1 << number_of_queens) - 1
+    queen_positions_per_row: list[int] = []
+    # One entry per placed row: the masks before it and the free columns not tried yet.
+    stack = [((0, 0, 0), full)]
+    while stack:
+        masks, free = stack[-1]
+        if len(queen_positions_per_row) == number_of_queens:
+            return Chessboard(queen_positions_per_row)
+        if not free:
+            stack.pop()
+            if queen_positions_per_row:
+                queen_positions_per_row.pop()
+            continue
+        bit = free & -free
+        stack[-1] = (masks, free ^ bit)
+        col = bit.bit_length() - 1
+        queen_positions_per_row.append(col)
+        child = _place(number_of_queens, masks, col)
+        stack.append((child, ~(child[0] | child[1] | child[2]) & full))
+    return None
+
+
+def _expand(
+    cols: np.ndarray, diag1: np.ndarray, diag2: np.ndarray, full: np.unsignedinteger
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Place a queen on every free column of the next row of every partial board.
+
+    The lowest free column of all boards is taken at once, repeatedly, dropping the boards that have no free
+    column left, so the work is proportional to the number of children.
+    """
+    one = cols.dtype.type(1)
+    free = ~(cols | diag1 | diag2) & full
+    keep = np.flatnonzero(free)
+    free, cols, diag1, diag2 = free[keep], cols[keep], diag1[keep], diag2[keep]
+    child_cols, child_diag1, child_diag2 = [], [], []
+    while len(free):
+        bit = free & (~free + one)
+        child_cols.append(cols | bit)
+        child_diag1.append(diag1 | bit)
+        child_diag2.append(diag2 | bit)
+        free ^= bit
+        keep = np.flatnonzero(free)
+        free, cols, diag1, diag2 = free[keep], cols[keep], diag1[keep], diag2[keep]
+    if not child_cols:
+        return cols, diag1, diag2
+    return (
+        np.concatenate(child_cols),
+        (np.concatenate(child_diag1) << one) & full,
+        np.concatenate(child_diag2) >> one,
+    )
+
+
+def _count_frontier(
+    number_of_queens: int, row: int, cols: np.ndarray, diag1: np.ndarray, diag2: np.ndarray, max_boards: int
+) -> int:
+    """Count the completions of the partial boards whose next row is `row`, expanding them a row at a time.
+
+    Frontiers larger than `max_boards` are split and counted one half after the other, which bounds the memory.
+    The last row is not expanded: its completions are the free columns, counted with a popcount.
+    """
+    full = cols.dtype.type((1 << number_of_queens) - 1)
+    while row < number_of_queens - 1:
+        if len(cols) > max_boards:
+            half = len(cols) // 2
+            return _count_frontier(
+                number_of_queens, row, cols[:half], diag1[:half], diag2[:half], max_boards
+            ) + _count_frontier(number_of_queens, row, cols[half:], diag1[half:], diag2[half:], max_boards)
+        cols, diag1, diag2 = _expand(cols, diag1, diag2, full)
+        row += 1
+    return int(np.bitwise_count(~(cols | diag1 | diag2) & full).sum())
+
+
+def count_prefixes(number_of_queens: int, row: int, prefixes: list[Masks], max_boards: int = 2**16) -> int:
+    """Count the solutions that extend the given partial boards of `row` rows.
+
+    The bitmasks are stored in the narrowest unsigned type that fits a row, which cuts the memory traffic.
+    """
+    dtype = next(
+        dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64) if np.iinfo(dtype).bits >= number_of_queens
+    )
+    cols, diag1, diag2 = (np.array(masks, dtype=dtype) for masks in zip(*prefixes))
+    return _count_frontier(number_of_queens, row, cols, diag1, diag2, max_boards)
+
+
+def _prefixes(number_of_queens: int, prefix_rows: int) -> list[tuple[int, list[Masks]]]:
+    """The partial boards of the first `prefix_rows` rows, grouped by their weight under the mirror symmetry.
+
+    Mirroring the board swaps a solution with the queen of the first row in the left half with one in the right
+    half, so only the left half is searched and counted twice. With an odd size, the middle column is counted once.
+    """
+    groups = [(2, list(range(number_of_queens // 2)))]
+    if number_of_queens % 2 == 1:
+        groups.append((1, [number_of_queens // 2]))
+    full = (1 << number_of_queens) - 1
+    weighted_prefixes = []
+    for weight, first_cols in groups:
+        prefixes = [_place(number_of_queens, (0, 0, 0), col) for col in first_cols]
+        for _ in range(1, prefix_rows):
+            prefixes = [
+                _place(number_of_queens, masks, col)
+                for masks in prefixes
+                for col in range(number_of_queens)
+                if ~(masks[0] | masks[1] | masks[2]) & full & (1 << col)
+            ]
+        weighted_prefixes.append((weight, prefixes))
+    return weighted_prefixes
+
+
+def count_solutions(number_of_queens: int, max_workers: int | None = None, prefix_rows: int | None = None) -> int:
+    """Count the solutions of the N-Queens problem exactly.
+
+    The boards of the first `prefix_rows` rows (by default about a fifth of the rows) are enumerated once, using
+    the mirror symmetry, and split into chunks that are counted by `count_prefixes` on a process pool of
+    `max_workers` processes (by default one per CPU), or in this process if that is 1. Sizes from 1 to 64 are
+    supported.
+    """
+    if not 1 <= number_of_queens <= 64:
+        raise ValueError("Counting is only supported from 1 to 64 queens.")  # noqa: TRY003
+    if number_of_queens == 1:
+        return 1
+    prefix_rows = min(prefix_rows or max(1, number_of_queens // 5), number_of_queens - 1)
+    workers = max_workers or os.cpu_count() or 1
+    tasks = []
+    for weight, prefixes in _prefixes(number_of_queens, prefix_rows):
+        chunk_size = max(1, math.ceil(len(prefixes) / (4 * workers)))
+        tasks += [(weight, prefixes[start : start + chunk_size]) for start in range(0, len(prefixes), chunk_size)]
+
+    if workers == 1:
+        return sum(weight * count_prefixes(number_of_queens, prefix_rows, prefixes) for weight, prefixes in tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (weight, executor.submit(count_prefixes, number_of_queens, prefix_rows, prefixes))
+            for weight, prefixes in tasks
+        ]
+        return sum(weight * future.result() for weight, future in futures)
+
+
+@click.command()
+@click.option("--number-of-queens", type=int, required=True, help="Board size N.")
+@click.option("--count", is_flag=True, help="Count every solution instead of finding the first one.")
+@click.option("--max-workers", type=int, default=None, help="Worker processes for --count (default: every CPU).")
+def main(number_of_queens: int, count: bool, max_workers: int | None) -> None:
+    start_time = time.perf_counter()
+    if count:
+        result = f"{count_solutions(number_of_queens, max_workers)} solutions"
+    else:
+        board = find_solution(number_of_queens)
+        result = "no solution" if board is None else str(board.queen_positions_per_row)
+    print(f"N={number_of_queens}: {result} ({time.perf_counter() - start_time:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,34 @@
+from __future__ import annotations
+
 import random
+from collections import defaultdict
 from enum import Enum, auto
+from pathlib import Path
+
+import numpy as np
+
+from simulation.checkpoints import RandomGenerator, load_checkpoint, restore_rng, rng_state, save_checkpoint
+from simulation.instrumentation import InstrumentationStats
+
+# Random placement attempts per queen of `Chessboard.from_greedy_permutation`. The value is the one of the
+# initial search of Sosič and Gu, "3,000,000 Queens in Less Than One Minute" (SIGART Bulletin 2(2), 1991),
+# which leaves only a handful of rows without a free column.
+GREEDY_ATTEMPTS_PER_QUEEN = 3.08
+
+
+def _shuffle(values: list[int], rng: RandomGenerator | None) -> None:
+    if rng is None:
+        random.shuffle(values)
+    else:
+        rng.shuffle(values)
+
+
+def _choice(values: list[int], rng: RandomGenerator | None) -> int:
+    if rng is None:
+        return random.choice(values)  # noqa: S311
+    if isinstance(rng, np.random.Generator):
+        return values[int(rng.integers(len(values)))]
+    return rng.choice(values)
 
 
 class Chessboard:
@@ -8,10 +37,55 @@ class Chessboard:
         self.size = len(queen_positions_per_row)
 
     @classmethod
-    def from_random_permutation(cls, number_of_queens: int, seed: int = 42) -> "Chessboard":
-        random.seed(seed)
+    def from_random_permutation(
+        cls, number_of_queens: int, seed: int = 42, rng: RandomGenerator | None = None
+    ) -> Chessboard:
+        """Place the queens on a random permutation of the columns.
+
+        When `rng` is given the permutation is drawn from it and `seed` is ignored; otherwise the global `random`
+        module is seeded with `seed`.
+        """
+        if rng is None:
+            random.seed(seed)
         queen_positions_per_row = list(range(number_of_queens))
-        random.shuffle(queen_positions_per_row)
+        _shuffle(queen_positions_per_row, rng)
+        return cls(queen_positions_per_row)
+
+    @classmethod
+    def from_greedy_permutation(
+        cls, number_of_queens: int, seed: int = 42, random_rows: int = 8, rng: RandomGenerator | None = None
+    ) -> Chessboard:
+        """Place the queens row by row onto random columns that are free on both diagonals.
+
+        The columns form a permutation, so only diagonal conflicts are possible. When no free column is found
+        within the attempt budget, or only `random_rows` rows are left, the remaining rows get the remaining
+        columns in random order. The result has only a handful of conflicts for the solver to repair.
+        `seed` and `rng` are used as in `from_random_permutation`.
+        """
+        if rng is None:
+            random.seed(seed)
+        draw = random.random if rng is None else rng.random
+        size = number_of_queens
+        queen_positions_per_row = list(range(size))
+        diag1_occupied = bytearray(2 * size - 1)  # Top-left to bottom-right diagonals
+        diag2_occupied = bytearray(2 * size - 1)  # Top-right to bottom-left diagonals
+        remaining_attempts = int(GREEDY_ATTEMPTS_PER_QUEEN * size)
+
+        row = 0
+        while row < size - random_rows and remaining_attempts > 0:
+            remaining_attempts -= 1
+            candidate = row + int(draw() * (size - row))
+            col = queen_positions_per_row[candidate]
+            if diag1_occupied[row - col + size - 1] or diag2_occupied[row + col]:
+                continue
+            queen_positions_per_row[row], queen_positions_per_row[candidate] = col, queen_positions_per_row[row]
+            diag1_occupied[row - col + size - 1] = 1
+            diag2_occupied[row + col] = 1
+            row += 1
+
+        remaining_columns = queen_positions_per_row[row:]
+        _shuffle(remaining_columns, rng)
+        queen_positions_per_row[row:] = remaining_columns
         return cls(queen_positions_per_row)
 
     def __repr__(self) -> str:
@@ -22,22 +96,174 @@ class Chessboard:
         return board_str.strip()
 
 
+class ArrayChessboard(Chessboard):
+    """Chessboard storing the queen positions in a compact int32 NumPy array."""
+
+    def __init__(self, queen_positions_per_row: list[int] | np.ndarray):
+        self.queen_positions_per_row = np.asarray(queen_positions_per_row, dtype=np.int32)  # type: ignore  # noqa: PGH003
+        self.size = len(self.queen_positions_per_row)
+
+
 class SolverStatus(Enum):
     UNSOLVED = auto()
     SOLVED = auto()
     REACHED_MAX_NUMBER_OF_STEPS = auto()
 
 
+class ConflictIndex:
+    """Incremental index of queens grouped by their number of conflicts.
+
+    Besides the per-queen conflict counts it keeps the rows of the queens standing on every column and
+    diagonal, so that moving a queen only touches the queens sharing one of the six affected lines.
+    """
+
+    def __init__(self, queen_positions_per_row: list[int], queen_conflicts: list[int]):
+        self.size = len(queen_positions_per_row)
+        self.queen_conflicts = queen_conflicts
+        self.total_conflicts = sum(queen_conflicts)
+        self.queens_by_conflicts: dict[int, set[int]] = defaultdict(set)
+        self.rows_per_line: dict[tuple[int, int], set[int]] = defaultdict(set)
+
+        for row, col in enumerate(queen_positions_per_row):
+            self.queens_by_conflicts[queen_conflicts[row]].add(row)
+            for line in self._lines(row, col):
+                self.rows_per_line[line].add(row)
+
+    def _lines(self, row: int, col: int) -> tuple[tuple[int, int], tuple[int, int], tuple[int, int]]:
+        return (0, col), (1, row - col + self.size - 1), (2, row + col)
+
+    def max_conflict_queens(self) -> list[int]:
+        max_conflicts = max(self.queens_by_conflicts)
+        return sorted(self.queens_by_conflicts[max_conflicts])
+
+    def move(self, row: int, old_col: int, new_col: int, new_conflicts: int) -> None:
+        deltas: dict[int, int] = defaultdict(int)
+        for line in self._lines(row, old_col):
+            rows = self.rows_per_line[line]
+            rows.discard(row)
+            for other in rows:
+                deltas[other] -= 1
+            if not rows:
+                del self.rows_per_line[line]
+        for line in self._lines(row, new_col):
+            rows = self.rows_per_line[line]
+            for other in rows:
+                deltas[other] += 1
+            rows.add(row)
+
+        deltas[row] = new_conflicts - self.queen_conflicts[row]
+        for other, delta in deltas.items():
+            if delta:
+                self._set_conflicts(other, self.queen_conflicts[other] + delta)
+
+    def _set_conflicts(self, row: int, conflicts: int) -> None:
+        old_conflicts = self.queen_conflicts[row]
+        bucket = self.queens_by_conflicts[old_conflicts]
+        bucket.discard(row)
+        if not bucket:
+            del self.queens_by_conflicts[old_conflicts]
+        self.queens_by_conflicts[conflicts].add(row)
+        self.queen_conflicts[row] = conflicts
+        self.total_conflicts += conflicts - old_conflicts
+
+
 class Solver:
-    def __init__(self, board: Chessboard, max_steps: int = 100):
+    def __init__(
+        self,
+        board: Chessboard,
+        max_steps: int = 100,
+        incremental: bool = False,
+        rng: RandomGenerator | None = None,
+        stats: InstrumentationStats | None = None,
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: int = 10_000,
+    ):
         self.board = board
         self.max_steps = max_steps
+        self.incremental = incremental
+        self.rng = rng  # Falls back to the global `random` module when not given
+        # With stats, `solve` times its phases and summarizes (and, with a trace length, traces) the total conflicts
+        # after every step.
+        self.stats = stats
+        # With a checkpoint path, `solve` saves a checkpoint every `checkpoint_interval` steps, see `resume`.
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
         self.current_step = 0
         self.status = SolverStatus.UNSOLVED
-        self.row_conflicts = [0] * board.size
-        self.diag1_conflicts = [0] * (2 * board.size - 1)  # Top-left to bottom-right diagonals
-        self.diag2_conflicts = [0] * (2 * board.size - 1)  # Top-right to bottom-left diagonals
+        self.row_conflicts = self._new_counter(board.size)
+        self.diag1_conflicts = self._new_counter(2 * board.size - 1)  # Top-left to bottom-right diagonals
+        self.diag2_conflicts = self._new_counter(2 * board.size - 1)  # Top-right to bottom-left diagonals
+        self.conflict_index: ConflictIndex | None = None
         self._initialize_conflicts()
+        # Kept up to date by `_update_conflicts`, so `total_conflicts` does not scan the board.
+        self._total_conflicts = sum(self._all_queen_conflicts())
+        if incremental:
+            self._initialize_conflict_index()
+
+    def save_checkpoint(self, path: Path) -> None:
+        """Save the queen positions, the conflict counters, the step and the RNG state to a `.npz` file.
+
+        The conflict index is not saved: it only depends on the positions and is rebuilt by `resume`.
+        """
+        arrays = {
+            "queen_positions_per_row": np.asarray(self.board.queen_positions_per_row, dtype=np.int32),
+            "row_conflicts": np.asarray(self.row_conflicts, dtype=np.int32),
+            "diag1_conflicts": np.asarray(self.diag1_conflicts, dtype=np.int32),
+            "diag2_conflicts": np.asarray(self.diag2_conflicts, dtype=np.int32),
+        }
+        metadata = {
+            "solver": type(self).__name__,
+            "board": type(self.board).__name__,
+            "current_step": self.current_step,
+            "max_steps": self.max_steps,
+            "incremental": self.incremental,
+            "status": self.status.name,
+            "rng": rng_state(self.rng),
+        }
+        save_checkpoint(path, arrays, metadata)
+
+    @classmethod
+    def resume(
+        cls,
+        path: Path,
+        stats: InstrumentationStats | None = None,
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: int = 10_000,
+    ) -> Solver:
+        """Recreate a solver from a checkpoint; `solve` then takes exactly the steps the saved solver would have.
+
+        The solver keeps saving its checkpoints to `path` unless another `checkpoint_path` is given. A solver that
+        used the global `random` module gets its state restored into the global module.
+        """
+        arrays, metadata = load_checkpoint(path)
+        if metadata["solver"] != cls.__name__:
+            raise ValueError(f"The checkpoint is of a {metadata['solver']}, not of a {cls.__name__}.")  # noqa: TRY003
+        board_class = ArrayChessboard if metadata["board"] == ArrayChessboard.__name__ else Chessboard
+        solver = cls(
+            board_class(arrays["queen_positions_per_row"].tolist()),
+            max_steps=metadata["max_steps"],
+            incremental=metadata["incremental"],
+            rng=restore_rng(metadata["rng"]),
+            stats=stats,
+            checkpoint_path=checkpoint_path if checkpoint_path is not None else path,
+            checkpoint_interval=checkpoint_interval,
+        )
+        solver.row_conflicts[:] = arrays["row_conflicts"].tolist()
+        solver.diag1_conflicts[:] = arrays["diag1_conflicts"].tolist()
+        solver.diag2_conflicts[:] = arrays["diag2_conflicts"].tolist()
+        solver.current_step = metadata["current_step"]
+        solver.status = SolverStatus[metadata["status"]]
+        return solver
+
+    @property
+    def total_conflicts(self) -> int:
+        """Sum of the conflicts of every queen (each attacking pair is counted twice)."""
+        if self.conflict_index is not None:
+            return self.conflict_index.total_conflicts
+        return self._total_conflicts
+
+    def _new_counter(self, length: int) -> list[int]:
+        return [0] * length
 
     def _initialize_conflicts(self) -> None:
         for row, col in enumerate(self.board.queen_positions_per_row):
@@ -45,6 +271,16 @@ class Solver:
             self.diag1_conflicts[row - col + self.board.size - 1] += 1
             self.diag2_conflicts[row + col] += 1
 
+    def _all_queen_conflicts(self) -> list[int]:
+        return [
+            self._count_conflicts_for_position(row, col) for row, col in enumerate(self.board.queen_positions_per_row)
+        ]
+
+    def _initialize_conflict_index(self) -> None:
+        queen_positions_per_row = [int(col) for col in self.board.queen_positions_per_row]
+        queen_conflicts = self._all_queen_conflicts()
+        self.conflict_index = ConflictIndex(queen_positions_per_row, queen_conflicts)
+
     def _update_conflicts(self, row: int, old_col: int, new_col: int) -> None:
         self.row_conflicts[old_col] -= 1
         self.diag1_conflicts[row - old_col + self.board.size - 1] -= 1
@@ -54,6 +290,15 @@ class Solver:
         self.diag1_conflicts[row - new_col + self.board.size - 1] += 1
         self.diag2_conflicts[row + new_col] += 1
 
+        new_conflicts = self._count_conflicts_for_position(row, new_col)
+        if self.conflict_index is not None:
+            self.conflict_index.move(row, old_col, new_col, new_conflicts)
+        else:
+            # The queens left on the old lines lose a conflict each, and those on the new lines gain one; both
+            # ends of every pair count it.
+            old_conflicts = self._count_conflicts_for_position(row, old_col) + 3
+            self._total_conflicts += 2 * (new_conflicts - old_conflicts)
+
     def _count_conflicts_for_position(self, row: int, col: int) -> int:
         return (
             self.row_conflicts[col]
@@ -63,30 +308,52 @@ class Solver:
         )
 
     def _has_conflicts(self) -> bool:
+        if self.conflict_index is not None:
+            return self.conflict_index.total_conflicts > 0
         return any(
             self._count_conflicts_for_position(row, col) > 0
             for row, col in enumerate(self.board.queen_positions_per_row)
         )
 
     def solve(self) -> None:
-        while self.current_step < self.max_steps and self._has_conflicts():
+        has_conflicts = self._has_conflicts
+        find_max_conflict_queens = self._find_max_conflict_queens
+        find_min_conflict_positions = self._find_min_conflict_positions
+        update_conflicts = self._update_conflicts
+        if self.stats is not None:
+            has_conflicts = self.stats.timed("has_conflicts", has_conflicts)
+            find_max_conflict_queens = self.stats.timed("find_max_conflict_queens", find_max_conflict_queens)
+            find_min_conflict_positions = self.stats.timed("find_min_conflict_positions", find_min_conflict_positions)
+            update_conflicts = self.stats.timed("update_conflicts", update_conflicts)
+            self.stats.trace("conflicts", self.current_step, self.total_conflicts)
+        checkpoint_path = self.checkpoint_path
+
+        while self.current_step < self.max_steps and has_conflicts():
             self.current_step += 1
-            max_conflict_queens = self._find_max_conflict_queens()
-            queen_to_move = random.choice(max_conflict_queens)  # noqa: S311
-            min_conflict_positions = self._find_min_conflict_positions(queen_to_move)
-            new_position = random.choice(min_conflict_positions)  # noqa: S311
+            max_conflict_queens = find_max_conflict_queens()
+            queen_to_move = _choice(max_conflict_queens, self.rng)
+            min_conflict_positions = find_min_conflict_positions(queen_to_move)
+            new_position = _choice(min_conflict_positions, self.rng)
 
             old_position = self.board.queen_positions_per_row[queen_to_move]
             self.board.queen_positions_per_row[queen_to_move] = new_position
-            self._update_conflicts(queen_to_move, old_position, new_position)
+            update_conflicts(queen_to_move, old_position, new_position)
+            if self.stats is not None:
+                total_conflicts = self.total_conflicts
+                self.stats.record("conflicts", total_conflicts)
+                self.stats.trace("conflicts", self.current_step, total_conflicts)
+            if checkpoint_path is not None and self.current_step % self.checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint_path)
 
-        if self._has_conflicts():
+        if has_conflicts():
             self.status = SolverStatus.REACHED_MAX_NUMBER_OF_STEPS
             raise RuntimeError("Failed to solve the board within the maximum number of steps.")  # noqa: TRY003
 
         self.status = SolverStatus.SOLVED
 
     def _find_max_conflict_queens(self) -> list[int]:
+        if self.conflict_index is not None:
+            return self.conflict_index.max_conflict_queens()
         max_conflicts = -1
         max_conflict_queens = []
         for row, col in enumerate(self.board.queen_positions_per_row):
@@ -116,6 +383,187 @@ class Solver:
         return min_conflict_positions
 
 
+class ArraySolver(Solver):
+    """Solver backed by int32 NumPy conflict counters.
+
+    Meant to be used with an `ArrayChessboard`. The board scans are vectorized, while the steps and the
+    RNG draws stay identical to `Solver`, so the same seed leads to the same solution.
+    """
+
+    def __init__(
+        self,
+        board: Chessboard,
+        max_steps: int = 100,
+        incremental: bool = False,
+        rng: RandomGenerator | None = None,
+        stats: InstrumentationStats | None = None,
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: int = 10_000,
+    ):
+        self._rows = np.arange(board.size)
+        self._column_conflicts = np.empty(board.size, dtype=np.int32)  # Scratch buffer of the column scan
+        super().__init__(
+            board,
+            max_steps=max_steps,
+            incremental=incremental,
+            rng=rng,
+            stats=stats,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval,
+        )
+
+    def _new_counter(self, length: int) -> np.ndarray:  # type: ignore[override]
+        return np.zeros(length, dtype=np.int32)
+
+    def _initialize_conflicts(self) -> None:
+        size = self.board.size
+        cols = np.asarray(self.board.queen_positions_per_row)
+        self.row_conflicts[:] = np.bincount(cols, minlength=size)
+        self.diag1_conflicts[:] = np.bincount(self._rows - cols + size - 1, minlength=2 * size - 1)
+        self.diag2_conflicts[:] = np.bincount(self._rows + cols, minlength=2 * size - 1)
+
+    def _queen_conflicts(self) -> np.ndarray:
+        size = self.board.size
+        cols = np.asarray(self.board.queen_positions_per_row)
+        row_conflicts = np.asarray(self.row_conflicts)
+        diag1_conflicts = np.asarray(self.diag1_conflicts)
+        diag2_conflicts = np.asarray(self.diag2_conflicts)
+        conflicts: np.ndarray = (
+            row_conflicts[cols] + diag1_conflicts[self._rows - cols + size - 1] + diag2_conflicts[self._rows + cols] - 3
+        )
+        return conflicts
+
+    def _all_queen_conflicts(self) -> list[int]:
+        return self._queen_conflicts().tolist()  # type: ignore  # noqa: PGH003
+
+    def _count_conflicts_for_position(self, row: int, col: int) -> int:
+        return int(super()._count_conflicts_for_position(row, col))
+
+    def _has_conflicts(self) -> bool:
+        if self.conflict_index is not None:
+            return super()._has_conflicts()
+        # A queen is in conflict exactly when one of the lines holds more than one queen.
+        return bool(
+            np.max(self.row_conflicts) > 1 or np.max(self.diag1_conflicts) > 1 or np.max(self.diag2_conflicts) > 1
+        )
+
+    def _find_max_conflict_queens(self) -> list[int]:
+        if self.conflict_index is not None:
+            return super()._find_max_conflict_queens()
+        conflicts = self._queen_conflicts()
+        return np.flatnonzero(conflicts == conflicts.max()).tolist()
+
+    def _find_min_conflict_positions(self, queen_index: int) -> list[int]:
+        size = self.board.size
+        diag1_conflicts = np.asarray(self.diag1_conflicts)
+        diag2_conflicts = np.asarray(self.diag2_conflicts)
+        # Column `col` lies on diagonal `queen_index - col + size - 1` and anti-diagonal `queen_index + col`,
+        # so the per-column costs of a row are contiguous (reversed) slices of the diagonal counters.
+        # A column holds at most 3 * size conflicts, so the sums fit the int32 buffer reused across steps.
+        conflicts = self._column_conflicts
+        np.add(self.row_conflicts, diag1_conflicts[queen_index : queen_index + size][::-1], out=conflicts)
+        np.add(conflicts, diag2_conflicts[queen_index : queen_index + size], out=conflicts)
+        conflicts[self.board.queen_positions_per_row[queen_index]] = np.iinfo(np.int32).max
+        return np.flatnonzero(conflicts == conflicts.min()).tolist()
+
+
+class BatchSolver:
+    """Min-conflicts solver that steps a batch of equally sized boards in lockstep.
+
+    The positions are kept in a `(boards, size)` array and the line counters in 2-D arrays with a row per board.
+    Every step picks the most conflicted queen and its best column for all unsolved boards with a few vectorized
+    operations; boards leave the active set once solved or out of steps. Ties are broken uniformly at random with
+    `rng`, so the moves differ from those of `Solver`, but the heuristic is the same. Like `Solver`, it works on
+    the given boards: `solve` writes the final positions back into each board's `queen_positions_per_row`.
+    """
+
+    def __init__(self, boards: list[Chessboard], max_steps: int = 100, rng: np.random.Generator | None = None):
+        if len({board.size for board in boards}) > 1:
+            raise ValueError("All boards of a batch must have the same size.")  # noqa: TRY003
+        self.boards = boards
+        self.max_steps = max_steps
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.positions = np.array([board.queen_positions_per_row for board in boards], dtype=np.int64)
+        self.number_of_boards, self.size = len(boards), boards[0].size if boards else 0
+        self.steps = np.zeros(self.number_of_boards, dtype=np.int64)
+        self.solved = np.zeros(self.number_of_boards, dtype=bool)
+        self._rows = np.arange(self.size)
+        self._initialize_conflicts()
+
+    def _initialize_conflicts(self) -> None:
+        # Offsetting the line indices of board `b` by `b * lines` counts every board with a single bincount.
+        size, number_of_boards = self.size, self.number_of_boards
+        diagonals = 2 * size - 1
+        board_offsets = np.arange(number_of_boards)[:, None]
+        self.row_conflicts = np.bincount(
+            (board_offsets * size + self.positions).ravel(), minlength=number_of_boards * size
+        ).reshape(number_of_boards, size)
+        self.diag1_conflicts = np.bincount(
+            (board_offsets * diagonals + self._rows - self.positions + size - 1).ravel(),
+            minlength=number_of_boards * diagonals,
+        ).reshape(number_of_boards, diagonals)
+        self.diag2_conflicts = np.bincount(
+            (board_offsets * diagonals + self._rows + self.positions).ravel(), minlength=number_of_boards * diagonals
+        ).reshape(number_of_boards, diagonals)
+
+    def _queen_conflicts(self, active: np.ndarray) -> np.ndarray:
+        # Gathering from the flattened counters is about twice as fast as 2-D fancy indexing.
+        size = self.size
+        cols = self.positions[active]
+        row_offsets, diagonal_offsets = active[:, None] * size, active[:, None] * (2 * size - 1)
+        conflicts: np.ndarray = (
+            self.row_conflicts.ravel()[row_offsets + cols]
+            + self.diag1_conflicts.ravel()[diagonal_offsets + self._rows - cols + size - 1]
+            + self.diag2_conflicts.ravel()[diagonal_offsets + self._rows + cols]
+            - 3
+        )
+        return conflicts
+
+    def _random_argmax(self, candidates: np.ndarray) -> np.ndarray:
+        """Index of a uniformly chosen `True` entry in every row of `candidates`."""
+        return np.argmax(np.where(candidates, self.rng.random(candidates.shape), -1.0), axis=1)
+
+    def _move(self, active: np.ndarray, queens: np.ndarray, old_cols: np.ndarray, new_cols: np.ndarray) -> None:
+        size = self.size
+        self.row_conflicts[active, old_cols] -= 1
+        self.diag1_conflicts[active, queens - old_cols + size - 1] -= 1
+        self.diag2_conflicts[active, queens + old_cols] -= 1
+        self.row_conflicts[active, new_cols] += 1
+        self.diag1_conflicts[active, queens - new_cols + size - 1] += 1
+        self.diag2_conflicts[active, queens + new_cols] += 1
+        self.positions[active, queens] = new_cols
+
+    def solve(self) -> None:
+        """Step every unsolved board until it is solved or has taken `max_steps` steps; see `solved` and `steps`."""
+        size = self.size
+        active = np.flatnonzero(~self.solved)
+        while active.size > 0:
+            conflicts = self._queen_conflicts(active)
+            max_conflicts = conflicts.max(axis=1)
+            self.solved[active[max_conflicts == 0]] = True
+            keep = (max_conflicts > 0) & (self.steps[active] < self.max_steps)
+            active, conflicts, max_conflicts = active[keep], conflicts[keep], max_conflicts[keep]
+            if active.size == 0:
+                break
+
+            queens = self._random_argmax(conflicts == max_conflicts[:, None])
+            old_cols = self.positions[active, queens]
+            diagonal_offsets = active[:, None] * (2 * size - 1) + queens[:, None]
+            costs = (
+                self.row_conflicts[active]
+                + self.diag1_conflicts.ravel()[diagonal_offsets - self._rows + size - 1]
+                + self.diag2_conflicts.ravel()[diagonal_offsets + self._rows]
+            )
+            costs[np.arange(active.size), old_cols] = np.iinfo(costs.dtype).max
+            new_cols = self._random_argmax(costs == costs.min(axis=1)[:, None])
+
+            self._move(active, queens, old_cols, new_cols)
+            self.steps[active] += 1
+
+        for board, positions in zip(self.boards, self.positions):
+            board.queen_positions_per_row = positions.tolist()
+
+
 def main() -> None:
     board = Chessboard.from_random_permutation(64)
     solver = Solver(board, max_steps=100)
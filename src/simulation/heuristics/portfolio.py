@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing.synchronize import Event
+
+from simulation.heuristics.n_queens import Chessboard, Solver
+
+_stop_event: Event | None = None
+
+
+@dataclass
+class PortfolioResult:
+    board: Chessboard | None
+    seed: int | None
+    steps: int
+    total_steps: int
+    attempts: int
+    time_seconds: float
+
+    @property
+    def solved(self) -> bool:
+        return self.board is not None
+
+
+def _initialize_worker(stop_event: Event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _run_attempt(
+    number_of_queens: int, seed: int, max_steps: int, check_interval: int
+) -> tuple[int, list[int] | None, int]:
+    """Run one seeded attempt, giving up early once another attempt has found a solution.
+
+    The solver is stepped in chunks of `check_interval` steps; `Solver.solve` continues from `current_step`,
+    so the chunking does not change the steps taken.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    board = Chessboard.from_random_permutation(number_of_queens, rng=rng)
+    solver = Solver(board, max_steps=0, incremental=True, rng=rng)
+    while True:
+        solver.max_steps = min(solver.current_step + check_interval, max_steps)
+        try:
+            solver.solve()
+        except RuntimeError:
+            if solver.current_step >= max_steps or (_stop_event is not None and _stop_event.is_set()):
+                return seed, None, solver.current_step
+        else:
+            return seed, board.queen_positions_per_row, solver.current_step
+
+
+def solve_portfolio(
+    number_of_queens: int,
+    attempts: int = 4,
+    max_steps: int = 10_000,
+    seed: int = 0,
+    max_workers: int | None = None,
+    check_interval: int = 1_000,
+) -> PortfolioResult:
+    """Race `attempts` differently seeded solvers on a process pool and return the first solution found.
+
+    Attempts use the seeds `seed, seed + 1, ...`. Once a solution is found the pending attempts are cancelled
+    and the running ones stop at their next check. `total_steps` sums the steps of every attempt that ran.
+    """
+    start_time = time.perf_counter()
+    stop_event = multiprocessing.Event()
+    winner: tuple[int, list[int], int] | None = None
+    total_steps = 0
+    attempts_run = 0
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_initialize_worker, initargs=(stop_event,)
+    ) as executor:
+        pending = {
+            executor.submit(_run_attempt, number_of_queens, attempt_seed, max_steps, check_interval)
+            for attempt_seed in range(seed, seed + attempts)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                attempt_seed, queen_positions_per_row, steps = future.result()
+                attempts_run += 1
+                total_steps += steps
+                if queen_positions_per_row is not None and winner is None:
+                    winner = (attempt_seed, queen_positions_per_row, steps)
+                    stop_event.set()
+                    for other in pending:
+                        other.cancel()
+
+    if winner is None:
+        return PortfolioResult(None, None, 0, total_steps, attempts_run, time.perf_counter() - start_time)
+    winner_seed, queen_positions_per_row, steps = winner
+    return PortfolioResult(
+        Chessboard(queen_positions_per_row),
+        winner_seed,
+        steps,
+        total_steps,
+        attempts_run,
+        time.perf_counter() - start_time,
+    )
+
+
+def solve_with_restarts(
+    number_of_queens: int,
+    initial_max_steps: int = 100,
+    growth_factor: float = 2.0,
+    max_restarts: int = 10,
+    seed: int = 0,
+) -> PortfolioResult:
+    """Restart the solver with a fresh seed and a geometrically growing step budget until it succeeds."""
+    start_time = time.perf_counter()
+    total_steps = 0
+    max_steps: float = initial_max_steps
+
+    for attempt in range(max_restarts + 1):
+        rng = random.Random(seed + attempt)  # noqa: S311
+        board = Chessboard.from_random_permutation(number_of_queens, rng=rng)
+        solver = Solver(board, max_steps=int(max_steps), incremental=True, rng=rng)
+        try:
+            solver.solve()
+        except RuntimeError:
+            total_steps += solver.current_step
+            max_steps *= growth_factor
+            continue
+
+        total_steps += solver.current_step
+        return PortfolioResult(
+            board, seed + attempt, solver.current_step, total_steps, attempt + 1, time.perf_counter() - start_time
+        )
+
+    return PortfolioResult(None, None, 0, total_steps, max_restarts + 1, time.perf_counter() - start_time)
+
+
+def main() -> None:
+    number_of_queens = 1000
+    for name, result in [
+        ("portfolio", solve_portfolio(number_of_queens, attempts=4, max_steps=number_of_queens * 100)),
+        ("restarts", solve_with_restarts(number_of_queens, initial_max_steps=number_of_queens)),
+    ]:
+        print(
+            f"{name}: solved={result.solved} (seed={result.seed}) in {result.steps} steps, "
+            f"{result.total_steps} steps over {result.attempts} attempts, {result.time_seconds:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import math
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class ValueSummary:
+    """Count, sum, minimum and maximum of the values recorded under one name, in constant memory."""
+
+    __slots__ = ("count", "maximum", "minimum", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def add_many(self, values: Iterable[float]) -> None:
+        values = list(values)
+        if values:
+            self.count += len(values)
+            self.total += sum(values)
+            self.minimum = min(self.minimum, min(values))
+            self.maximum = max(self.maximum, max(values))
+
+    def merge(self, other: "ValueSummary") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def to_dict(self) -> dict:
+        if not self.count:
+            return {"count": 0, "total": 0.0}
+        return {"count": self.count, "total": self.total, "min": self.minimum, "max": self.maximum}
+
+
+class ValueTrace:
+    """The values recorded at a subset of the steps of one run, at most `max_length` of them.
+
+    A value is kept every `stride` steps. When the trace outgrows `max_length`, every other point is dropped and the
+    stride doubles, so the trace always spans the whole run with at most `max_length` evenly spaced points. A step
+    that does not follow the last one starts another run, which ends the trace.
+    """
+
+    __slots__ = ("ended", "last_step", "max_length", "steps", "stride", "values")
+
+    def __init__(self, max_length: int) -> None:
+        if max_length < 2:
+            raise ValueError(f"A trace needs room for at least 2 values, got {max_length}.")  # noqa: TRY003
+        self.max_length = max_length
+        self.stride = 1
+        self.last_step = -1
+        self.ended = False
+        self.steps: list[int] = []
+        self.values: list[float] = []
+
+    def add(self, step: int, value: float) -> None:
+        if step <= self.last_step:
+            self.ended = True
+        if self.ended:
+            return
+        self.last_step = step
+        if step % self.stride:
+            return
+        self.steps.append(step)
+        self.values.append(value)
+        if len(self.steps) > self.max_length:
+            self.stride *= 2
+            kept = [i for i, kept_step in enumerate(self.steps) if kept_step % self.stride == 0]
+            self.steps = [self.steps[i] for i in kept]
+            self.values = [self.values[i] for i in kept]
+
+    def to_dict(self) -> dict:
+        return {"stride": self.stride, "steps": list(self.steps), "values": list(self.values)}
+
+
+class InstrumentationStats:
+    """Counters, cumulative timers and value summaries collected by an instrumented run.
+
+    Instrumented classes take an optional instance and check it against `None` once per phase or step, so a
+    run without one pays next to nothing. Recorded values are only summarized (see `ValueSummary`), so the stats
+    stay the same size however long the run. With `trace_length`, `trace` also keeps the trajectory of a value
+    over the steps of a run, thinned to at most `trace_length` points (see `ValueTrace`). Stats from different runs
+    or worker processes are combined with `merge`; a trace follows a single run, so only the first one is kept.
+    """
+
+    def __init__(self, trace_length: int = 0) -> None:
+        self.counters: dict[str, int] = {}
+        self.timers: dict[str, float] = {}
+        self.summaries: dict[str, ValueSummary] = {}
+        self.trace_length = trace_length
+        self.traces: dict[str, ValueTrace] = {}
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def record(self, name: str, value: float) -> None:
+        summary = self.summaries.get(name)
+        if summary is None:
+            summary = self.summaries[name] = ValueSummary()
+        summary.add(value)
+
+    def record_many(self, name: str, values: Iterable[float]) -> None:
+        self.summaries.setdefault(name, ValueSummary()).add_many(values)
+
+    def trace(self, name: str, step: int, value: float) -> None:
+        if not self.trace_length:
+            return
+        trace = self.traces.get(name)
+        if trace is None:
+            trace = self.traces[name] = ValueTrace(self.trace_length)
+        trace.add(step, value)
+
+    def timed(self, name: str, function: Callable[..., T]) -> Callable[..., T]:
+        """Wrap `function` so that its calls are counted under `name` and their time is added to timer `name`."""
+
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add_time(name, time.perf_counter() - start_time)
+                self.count(name)
+
+        return wrapper
+
+    def merge(self, other: "InstrumentationStats") -> None:
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for name, seconds in other.timers.items():
+            self.add_time(name, seconds)
+        for name, summary in other.summaries.items():
+            self.summaries.setdefault(name, ValueSummary()).merge(summary)
+        for name, trace in other.traces.items():
+            self.traces.setdefault(name, trace)
+
+    def to_dict(self) -> dict:
+        return {
+            "counters": dict(self.counters),
+            "timers": dict(self.timers),
+            "summaries": {name: summary.to_dict() for name, summary in self.summaries.items()},
+            "traces": {name: trace.to_dict() for name, trace in self.traces.items()},
+        }
+
+    def report(self) -> str:
+        """One line per timer (with its call count and mean time), per counter without a timer and per summary."""
+        lines = [
+            f"{name}: {seconds:.4f}s over {self.counters.get(name, 0)} calls"
+            + (f" ({seconds / self.counters[name] * 1e6:.2f} µs/call)" if self.counters.get(name) else "")
+            for name, seconds in sorted(self.timers.items(), key=lambda item: -item[1])
+        ]
+        lines += [f"{name}: {amount}" for name, amount in sorted(self.counters.items()) if name not in self.timers]
+        lines += [
+            f"{name}: mean {summary.mean:.2f}, min {summary.minimum:g}, max {summary.maximum:g} over {summary.count} values"
+            for name, summary in sorted(self.summaries.items())
+            if summary.count
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from statistics import NormalDist
+
+import numpy as np
+
+
+def critical_value(confidence: float) -> float:
+    """The `z` of a two-sided normal confidence interval at the given level (1.96 for 0.95)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+class RunningStatistics:
+    """Running mean and variance of a scalar or a vector of metrics (Welford's algorithm).
+
+    Batches and other instances are combined with the parallel update of Chan et al., so the memory use does
+    not depend on the number of samples.
+    """
+
+    def __init__(self, shape: int | tuple[int, ...] = ()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self._sum_of_squared_deviations = np.zeros(shape)
+
+    def update(self, value: float | np.ndarray) -> None:
+        value = np.asarray(value, dtype=float)
+        self.count += 1
+        delta = value - self.mean
+        self.mean = self.mean + delta / self.count
+        self._sum_of_squared_deviations = self._sum_of_squared_deviations + delta * (value - self.mean)
+
+    def update_batch(self, values: np.ndarray) -> None:
+        """Add the samples along the first axis of `values`."""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self._combine(len(values), values.mean(axis=0), ((values - values.mean(axis=0)) ** 2).sum(axis=0))
+
+    def merge(self, other: RunningStatistics) -> None:
+        if other.count > 0:
+            self._combine(other.count, other.mean, other._sum_of_squared_deviations)
+
+    def _combine(self, count: int, mean: np.ndarray, sum_of_squared_deviations: np.ndarray) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self._sum_of_squared_deviations = (
+            self._sum_of_squared_deviations + sum_of_squared_deviations + delta**2 * self.count * count / total
+        )
+        self.count = total
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance (with Bessel's correction)."""
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return self._sum_of_squared_deviations / (self.count - 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation, as returned by `np.std`."""
+        if self.count < 1:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self._sum_of_squared_deviations / self.count)
+
+    def half_width(self, confidence: float = 0.95) -> np.ndarray:
+        """Half-width of the normal-approximation confidence interval of the mean."""
+        half_width: np.ndarray = critical_value(confidence) * np.sqrt(self.variance / self.count)
+        return half_width
@@ -0,0 +1,305 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import scipy.stats as stats
+
+from simulation.demo_5.server_system import (
+    DEFAULT_VARIATE_BLOCK_SIZE,
+    CustomerLog,
+    ServerSystem,
+    Simulation,
+    compare_simulations,
+    run_single_simulation,
+)
+from simulation.instrumentation import InstrumentationStats
+
+EXERCISES = {
+    "1": (stats.expon(scale=1 / 10), [stats.gamma(a=3, scale=1 / 40)]),
+    "2": (stats.expon(scale=1 / 6), [stats.expon(scale=1 / 4), stats.expon(scale=1 / 3)]),
+}
+
+
+@pytest.mark.parametrize("exercise", ["1", "2"])
+@pytest.mark.parametrize("seed", range(5))
+def test_heap_engine_matches_simpy(exercise, seed):
+    interarrival_time_rv, service_time_rvs = EXERCISES[exercise]
+    simpy_summary = run_single_simulation(
+        seed, 9.0, interarrival_time_rv, service_time_rvs, engine="simpy", variate_block_size=DEFAULT_VARIATE_BLOCK_SIZE
+    )
+    heap_summary = run_single_simulation(seed, 9.0, interarrival_time_rv, service_time_rvs, engine="heap")
+    assert heap_summary == simpy_summary
+
+
+def test_unknown_engine():
+    interarrival_time_rv, service_time_rvs = EXERCISES["1"]
+    with pytest.raises(ValueError, match="Unknown engine"):
+        ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine="numba")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lindley_fast_path_matches_heap_engine(seed):
+    interarrival_time_rv, service_time_rvs = EXERCISES["1"]
+    heap_summary = run_single_simulation(
+        seed, 9.0, interarrival_time_rv, service_time_rvs, engine="heap", variate_block_size=32
+    )
+    fast_summary = run_single_simulation(
+        seed, 9.0, interarrival_time_rv, service_time_rvs, engine="fast", variate_block_size=32
+    )
+    total_customers, end_time, average_spent_time, customers_per_server = fast_summary
+    assert total_customers == heap_summary[0]
+    assert end_time == pytest.approx(heap_summary[1], rel=1e-12)
+    assert average_spent_time == pytest.approx(heap_summary[2], rel=1e-12)
+    assert customers_per_server == heap_summary[3]
+
+
+def test_fast_engine_uses_heap_for_multiple_servers():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    heap_summary = run_single_simulation(3, 9.0, interarrival_time_rv, service_time_rvs, engine="heap")
+    fast_summary = run_single_simulation(3, 9.0, interarrival_time_rv, service_time_rvs, engine="fast")
+    assert fast_summary == heap_summary
+
+
+def test_sequential_stopping():
+    interarrival_time_rv, service_time_rvs = EXERCISES["1"]
+    simulation = Simulation(
+        number_of_simulations=5000,
+        arrival_end_time=9.0,
+        interarrival_time_rv=interarrival_time_rv,
+        service_time_rvs=service_time_rvs,
+        engine="fast",
+        relative_precision=0.05,
+        wave_size=50,
+    )
+    completed = len(simulation.total_customers_per_simulation)
+    assert 50 <= completed < 5000
+    assert completed % 50 == 0
+    assert simulation.statistics.count == completed
+    assert np.all(simulation.statistics.half_width(0.95) <= 0.05 * simulation.statistics.mean)
+    assert simulation.statistics.mean[2] == pytest.approx(np.mean(simulation.average_spent_times_per_simulation))
+
+
+def test_customer_log_grows_and_views():
+    log = CustomerLog(capacity=2)
+    for arrival_time in [0.5, 1.0, 1.5]:
+        log.append(arrival_time)
+    log.extend(np.array([2.0, 2.5]), np.array([2.0, 2.6]), np.array([0.1, 0.2]), server_ids=1)
+
+    assert len(log) == 5
+    assert log.arrival_times[:5].tolist() == [0.5, 1.0, 1.5, 2.0, 2.5]
+    assert log.departure_times[3:].tolist() == pytest.approx([2.1, 2.8])
+
+    customer = log[0]
+    with pytest.raises(ValueError, match="Service has not started yet"):
+        _ = customer.departure_time
+    customer.server_id = 0
+    customer.service_start_time = 0.7
+    customer.service_time = 0.3
+    assert customer.departure_time == pytest.approx(1.0)
+    assert [c.customer_id for c in log] == [0, 1, 2, 3, 4]
+    assert log[4].server_id == 1
+
+
+def test_customers_are_views_of_the_log():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    server_system = ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine="heap")
+    server_system.run(seed=0)
+    total_customers, end_time, average_spent_time, customers_per_server = server_system.summary()
+
+    customers = server_system.customers
+    assert len(customers) == total_customers
+    assert end_time == max(c.departure_time for c in customers)
+    assert average_spent_time == pytest.approx(np.mean([c.departure_time - c.arrival_time for c in customers]))
+    assert customers_per_server == [sum(c.server_id == i for c in customers) for i in range(2)]
+    assert isinstance(customers, tuple)
+
+
+def test_summary_skips_customers_without_server():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    server_system = ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine="heap")
+    server_system.customer_log.extend(np.array([0.5, 1.0]), np.array([0.5, 1.0]), np.array([0.2, 0.2]), server_ids=1)
+    server_system.customer_log.append(1.5)
+    assert server_system.summary()[3] == [0, 2]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 3])
+def test_chunked_replications_match_single_runs(chunk_size):
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    simulation = Simulation(
+        number_of_simulations=10,
+        arrival_end_time=9.0,
+        interarrival_time_rv=interarrival_time_rv,
+        service_time_rvs=service_time_rvs,
+        engine="heap",
+        chunk_size=chunk_size,
+    )
+
+    assert simulation.results.shape == (10, 5)
+    for seed in range(10):
+        total_customers, end_time, average_spent_time, customers_per_server = run_single_simulation(
+            seed, 9.0, interarrival_time_rv, service_time_rvs, engine="heap"
+        )
+        assert simulation.total_customers_per_simulation[seed] == total_customers
+        assert simulation.end_times_per_simulation[seed] == end_time
+        assert simulation.average_spent_times_per_simulation[seed] == average_spent_time
+        assert simulation.customers_per_server_per_simulation[seed] == customers_per_server
+
+
+def test_control_variate_estimates():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    simulation = Simulation(300, 9.0, interarrival_time_rv, service_time_rvs, engine="fast", variate_block_size=64)
+    estimates = simulation.control_variate_estimates()
+    for name, column in [("end_time", 1), ("average_spent_time", 2)]:
+        estimate, half_width, factor = estimates[name]
+        assert factor >= 1
+        assert estimate == pytest.approx(simulation.results[:, column].mean(), abs=3 * half_width)
+    # The estimate is shifted towards the known mean of the control.
+    assert simulation.control_variate_estimates(expected_customers=50.0)["end_time"][0] != estimates["end_time"][0]
+
+
+def test_common_random_numbers():
+    simulations = [
+        Simulation(200, 9.0, *EXERCISES[exercise], engine="fast", variate_block_size=64) for exercise in ["1", "2"]
+    ]
+    comparison = compare_simulations(*simulations)
+    difference, _, factor = comparison["total_customers"]
+    assert factor > 2
+    assert difference == pytest.approx(
+        simulations[0].results[:, 0].mean() - simulations[1].results[:, 0].mean(), rel=1e-12
+    )
+
+
+@pytest.mark.parametrize("engine", ["simpy", "heap", "fast"])
+def test_instrumented_server_system(engine):
+    interarrival_time_rv, service_time_rvs = EXERCISES["1"]
+    reference = run_single_simulation(0, 9.0, interarrival_time_rv, service_time_rvs, engine=engine)
+    instrumentation_stats = InstrumentationStats()
+    summary = run_single_simulation(
+        0, 9.0, interarrival_time_rv, service_time_rvs, engine=engine, stats=instrumentation_stats
+    )
+    assert summary == reference
+    total_customers = summary[0]
+    assert instrumentation_stats.counters["arrivals"] == instrumentation_stats.counters["departures"] == total_customers
+    assert instrumentation_stats.summaries["queue_length"].count == total_customers
+    assert instrumentation_stats.summaries["queue_length"].minimum == 0
+    if engine == "simpy":
+        # One interarrival time per arrival and the one past the end time, one service time per customer.
+        assert instrumentation_stats.counters["sampling"] == 2 * total_customers + 1
+    else:
+        # One block of interarrival times and one draw of every customer's service times.
+        assert instrumentation_stats.counters["sampling"] == 2
+
+
+def test_simulation_merges_instrumentation():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+    simulation = Simulation(
+        20, 9.0, interarrival_time_rv, service_time_rvs, engine="heap", chunk_size=3, instrument=True
+    )
+    assert simulation.instrumentation_stats.counters["run"] == 20
+    assert simulation.instrumentation_stats.counters["arrivals"] == simulation.results[:, 0].sum()
+
+
+def test_import_is_light_and_leaves_logging_alone():
+    code = (
+        "import logging, sys; import simulation.demo_5.server_system; "
+        "assert not {'scipy', 'simpy', 'pandas', 'matplotlib'} & set(sys.modules), sys.modules.keys(); "
+        "assert not logging.getLogger().handlers"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)  # noqa: S603
+
+
+@pytest.mark.parametrize("exercise", ["1", "2"])
+@pytest.mark.parametrize("discipline", ["lifo", "shortest-service"])
+@pytest.mark.parametrize("server_selection", ["lowest-id", "fastest"])
+def test_dispatch_policies_match_simpy(exercise, discipline, server_selection):
+    interarrival_time_rv, service_time_rvs = EXERCISES[exercise]
+    summaries = [
+        run_single_simulation(
+            7,
+            9.0,
+            interarrival_time_rv,
+            service_time_rvs,
+            engine=engine,
+            variate_block_size=64,
+            discipline=discipline,
+            server_selection=server_selection,
+        )
+        for engine in ["simpy", "heap", "fast"]
+    ]
+    assert summaries[0] == summaries[1] == summaries[2]
+
+
+def test_dispatch_policies_order_the_waiting_customers():
+    interarrival_time_rv, service_time_rvs = EXERCISES["1"]
+    logs = {}
+    for discipline in ["fifo", "lifo", "shortest-service"]:
+        server_system = ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine="heap", discipline=discipline)
+        server_system.run(seed=3)
+        logs[discipline] = server_system.customer_log
+    assert np.all(np.diff(logs["fifo"].service_start_times[: logs["fifo"].size]) >= 0)
+
+    # A customer that waits is served after every later arrival that was already waiting (LIFO) or after every
+    # waiting customer with a shorter service (shortest service first).
+    for discipline in ["lifo", "shortest-service"]:
+        log = logs[discipline]
+        start_times, arrival_times = log.service_start_times[: log.size], log.arrival_times[: log.size]
+        service_times = log.service_times[: log.size]
+        for i in np.flatnonzero(start_times > arrival_times):
+            waiting = np.flatnonzero((arrival_times < start_times[i]) & (start_times > start_times[i]))
+            if discipline == "lifo":
+                assert not np.any(waiting > i)
+            else:
+                assert np.all(service_times[waiting] >= service_times[i])
+
+
+def test_fastest_server_selection():
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"][0], EXERCISES["2"][1][::-1]
+    for server_selection, first_server in [("lowest-id", 0), ("fastest", 1)]:
+        server_system = ServerSystem(
+            9.0, interarrival_time_rv, service_time_rvs, engine="heap", server_selection=server_selection
+        )
+        server_system.run(seed=1)
+        # The first customer finds both servers free; server 1 has the shorter mean service time.
+        assert server_system.customer_log[0].server_id == first_server
+    with pytest.raises(ValueError, match="Unknown discipline"):
+        ServerSystem(9.0, interarrival_time_rv, service_time_rvs, discipline="random")
+    with pytest.raises(ValueError, match="Unknown server selection"):
+        ServerSystem(9.0, interarrival_time_rv, service_time_rvs, server_selection="slowest")
+
+
+def test_simulation_resumes_from_checkpoint(tmp_path):
+    interarrival_time_rv, service_time_rvs = EXERCISES["2"]
+
+    def simulation(checkpoint_path, number_of_simulations=250, **kwargs):
+        return Simulation(
+            number_of_simulations,
+            9.0,
+            interarrival_time_rv,
+            service_time_rvs,
+            engine="heap",
+            variate_block_size=64,
+            wave_size=50,
+            checkpoint_path=checkpoint_path,
+            **kwargs,
+        )
+
+    uninterrupted = simulation(tmp_path / "uninterrupted.npz")
+    # Stands in for a run killed after its second wave.
+    simulation(tmp_path / "interrupted.npz", number_of_simulations=100, checkpoint_interval=50)
+    resumed = simulation(tmp_path / "interrupted.npz", checkpoint_interval=100)
+    shards = sorted(tmp_path.glob("interrupted.*.npy"))
+    assert [shard.name for shard in shards] == [
+        "interrupted.000000000-000000050.npy",
+        "interrupted.000000050-000000100.npy",
+        "interrupted.000000100-000000200.npy",
+        "interrupted.000000200-000000250.npy",
+    ]
+    assert sum(len(np.load(shard)) for shard in shards) == 250
+    assert np.array_equal(resumed.results, uninterrupted.results)
+    assert np.array_equal(resumed.statistics.mean, uninterrupted.statistics.mean)
+    assert np.array_equal(resumed.statistics.variance, uninterrupted.statistics.variance)
+    assert resumed.customers_per_server_per_simulation == uninterrupted.customers_per_server_per_simulation
+
+    with pytest.raises(ValueError, match="other settings"):
+        simulation(tmp_path / "interrupted.npz", discipline="lifo")
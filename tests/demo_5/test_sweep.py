@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.demo_5.server_system import run_single_simulation
+from simulation.demo_5.sweep import Configuration, grid, load_configurations, parse_distribution, run_sweep
+
+
+def test_parse_distribution():
+    rv = parse_distribution("gamma(a=3, scale=0.025)")
+    assert rv.mean() == pytest.approx(0.075)
+    with pytest.raises(ValueError, match="Invalid distribution"):
+        parse_distribution("os.system('true')")
+
+
+def test_grid_and_configuration_file(tmp_path):
+    configurations = grid([6, 10], [1, 2], ["expon(scale=0.25)"])
+    assert len(configurations) == 4
+    assert configurations[1] == Configuration("expon(scale=0.16666666666666666)", ("expon(scale=0.25)",) * 2)
+    assert configurations[0].expected_customers == pytest.approx(54)
+
+    path = tmp_path / "configurations.json"
+    path.write_text('[{"interarrival": "expon(scale=0.1)", "services": ["gamma(a=3, scale=0.025)"]}]')
+    assert load_configurations(path) == [Configuration("expon(scale=0.1)", ("gamma(a=3, scale=0.025)",))]
+
+
+def test_sweep_aggregates_and_reuses_results(tmp_path):
+    results_file = tmp_path / "sweep.csv"
+    configurations = grid([6, 10], [1, 2], ["expon(scale=0.25)"])
+    run_sweep(configurations[:3], results_file, replications=12, max_workers=2, chunk_size=5)
+    df = pd.read_csv(results_file)
+    assert len(df) == 3
+
+    configuration = configurations[3]
+    run_sweep(configurations, results_file, replications=12, max_workers=2, chunk_size=5)
+    df = pd.read_csv(results_file)
+    assert len(df) == 4  # only the new configuration was added
+    row = df[df["key"] == configuration.key(12, "fast", None)].iloc[0]
+
+    summaries = [
+        run_single_simulation(
+            seed,
+            9.0,
+            parse_distribution(configuration.interarrival),
+            [parse_distribution(service) for service in configuration.services],
+            engine="fast",
+        )
+        for seed in range(12)
+    ]
+    assert row["total_customers_mean"] == pytest.approx(np.mean([summary[0] for summary in summaries]))
+    assert row["average_spent_time_mean"] == pytest.approx(np.mean([summary[2] for summary in summaries]))
+    assert row["end_time_std"] == pytest.approx(np.std([summary[1] for summary in summaries], ddof=1))
+
+
+def test_sweep_confidence_level(tmp_path):
+    configuration = grid([6], [1], ["expon(scale=0.25)"])[0]
+    for confidence in [0.95, 0.99]:
+        run_sweep([configuration], tmp_path / "sweep.csv", replications=12, max_workers=1, confidence=confidence)
+    df = pd.read_csv(tmp_path / "sweep.csv").set_index("key")
+    assert len(df) == 2
+    assert sorted(df["confidence"]) == [0.95, 0.99]
+    assert df["variate_block_size"].isna().all()
+    half_widths = [
+        df.loc[configuration.key(12, "fast", None, confidence), "end_time_half_width"] for confidence in [0.95, 0.99]
+    ]
+    assert half_widths[1] / half_widths[0] == pytest.approx(2.5758 / 1.9600, rel=1e-4)
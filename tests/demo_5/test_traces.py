@@ -0,0 +1,39 @@
+import numpy as np
+import scipy.stats as stats
+
+from simulation.demo_5.server_system import ServerSystem, Simulation
+from simulation.demo_5.traces import TRACE_DTYPE, iter_traces, load_trace
+
+
+def test_simulation_writes_traces(tmp_path):
+    interarrival_time_rv = stats.expon(scale=1 / 6)
+    service_time_rvs = [stats.expon(scale=1 / 4), stats.expon(scale=1 / 3)]
+    simulation = Simulation(
+        number_of_simulations=6,
+        arrival_end_time=9.0,
+        interarrival_time_rv=interarrival_time_rv,
+        service_time_rvs=service_time_rvs,
+        engine="heap",
+        variate_block_size=64,
+        trace_dir=tmp_path,
+    )
+
+    traces = list(iter_traces(tmp_path))
+    assert [seed for seed, _ in traces] == list(range(6))
+    for seed, records in traces:
+        assert isinstance(records, np.memmap)
+        assert records.dtype == TRACE_DTYPE
+        assert len(records) == simulation.total_customers_per_simulation[seed]
+        departure_times = records["service_start_time"] + records["service_time"]
+        assert departure_times.max() == simulation.end_times_per_simulation[seed]
+        assert (
+            np.bincount(records["server_id"], minlength=2).tolist()
+            == (simulation.customers_per_server_per_simulation[seed])
+        )
+
+    server_system = ServerSystem(9.0, interarrival_time_rv, service_time_rvs, engine="heap", variate_block_size=64)
+    server_system.run(seed=4)
+    records = load_trace(tmp_path, 4)
+    log = server_system.customer_log
+    np.testing.assert_array_equal(records["arrival_time"], log.arrival_times[: log.size])
+    np.testing.assert_array_equal(records["service_time"], log.service_times[: log.size])
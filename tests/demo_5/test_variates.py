@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import scipy.stats as stats
+
+from simulation.demo_5.server_system import run_single_simulation
+from simulation.demo_5.variates import VariateBuffer
+
+
+@pytest.mark.parametrize("rv", [stats.expon(scale=1 / 6), stats.gamma(a=3, scale=1 / 40)])
+def test_buffer_matches_single_draws(rv):
+    rng = np.random.default_rng(7)
+    expected = [rv.rvs(random_state=rng) for _ in range(100)]
+
+    buffer = VariateBuffer(rv, np.random.default_rng(7), block_size=16)
+    drawn = [buffer.draw() for _ in range(30)]
+    drawn.extend(buffer.draw_many(20))
+    drawn.extend(buffer.draw() for _ in range(50))
+    assert drawn == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_buffered_engines_agree(seed):
+    interarrival_time_rv = stats.expon(scale=1 / 6)
+    service_time_rvs = [stats.expon(scale=1 / 4), stats.expon(scale=1 / 3)]
+    simpy_summary = run_single_simulation(
+        seed, 9.0, interarrival_time_rv, service_time_rvs, engine="simpy", variate_block_size=8
+    )
+    heap_summary = run_single_simulation(
+        seed, 9.0, interarrival_time_rv, service_time_rvs, engine="heap", variate_block_size=1024
+    )
+    assert heap_summary == simpy_summary
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from simulation.demo_6.e_approximation import (
+    estimate_e_antithetic,
+    estimate_e_batched,
+    estimate_e_streaming,
+    main,
+    simulate_antithetic_batch,
+    simulate_batch,
+)
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 8])
+def test_simulate_batch_distribution(block_size):
+    samples = simulate_batch(200_000, np.random.default_rng(0), block_size=block_size)
+    assert samples.min() >= 2
+    # P(N = n) = (n - 1) / n!
+    for n in [2, 3, 4]:
+        assert np.mean(samples == n) == pytest.approx((n - 1) / math.factorial(n), abs=0.005)
+    assert samples.mean() == pytest.approx(math.e, abs=0.01)
+
+
+def test_estimate_e_batched():
+    result = estimate_e_batched(200_000, seed=1, workers=2, chunk_size=30_000)
+    assert set(result) == {"estimate", "variance", "95%_CI"}
+    low, high = result["95%_CI"]
+    assert low < result["estimate"] < high
+    assert result["estimate"] == pytest.approx(math.e, abs=0.01)
+    assert result["variance"] == pytest.approx(3 * math.e - math.e**2, abs=0.02)
+    assert estimate_e_batched(200_000, seed=1, workers=2, chunk_size=30_000) == result
+
+
+def test_estimate_e_batched_single_run():
+    result = estimate_e_batched(1, seed=1)
+    assert result["estimate"] >= 2
+    assert math.isnan(result["variance"])
+
+
+def test_estimate_e_streaming():
+    progress = []
+    result = estimate_e_streaming(50_000, seed=2, batch_size=10_000, progress=progress.append, progress_interval=0.0)
+    assert result["n_runs"] == 50_000
+    assert [p["n_runs"] for p in progress] == [10_000, 20_000, 30_000, 40_000, 50_000]
+    assert result["estimate"] == pytest.approx(math.e, abs=0.02)
+
+    result = estimate_e_streaming(target_half_width=0.01, seed=2, batch_size=1_000)
+    low, high = result["95%_CI"]
+    assert (high - low) / 2 <= 0.01 + 1e-6
+    assert 10_000 < result["n_runs"] < 40_000
+
+    with pytest.raises(ValueError):
+        estimate_e_streaming()
+    with pytest.raises(ValueError, match="must be positive"):
+        estimate_e_streaming(target_half_width=0)
+    assert CliRunner().invoke(main, ["--target-half-width", "-0.1"]).exit_code == 2
+
+
+@pytest.mark.parametrize("options", [["--stream", "--batched"], ["--target-half-width", "0.01", "--workers", "2"]])
+def test_streaming_rejects_parallel_options(options):
+    result = CliRunner().invoke(main, options)
+    assert result.exit_code == 2
+    assert "--batched and --workers" in result.output
+
+
+@pytest.mark.parametrize("block_size", [1, 8])
+def test_simulate_antithetic_batch(block_size):
+    counts = simulate_antithetic_batch(100_000, np.random.default_rng(3), block_size=block_size)
+    assert counts.min() >= 2
+    for side in [0, 1]:
+        assert counts[:, side].mean() == pytest.approx(math.e, abs=0.015)
+    assert np.corrcoef(counts.T)[0, 1] < -0.3
+
+
+def test_estimate_e_antithetic():
+    result = estimate_e_antithetic(200_000, seed=4)
+    assert result["estimate"] == pytest.approx(math.e, abs=0.01)
+    assert result["variance_reduction_factor"] > 2
+    assert result["variance"] == pytest.approx(3 * math.e - math.e**2, abs=0.02)
+    assert result["pair_variance"] < result["variance"] / 4
+
+
+@pytest.mark.parametrize("options", [["--stream"], ["--target-half-width", "0.01"], ["--batched"], ["--workers", "2"]])
+def test_antithetic_rejects_other_engines(options):
+    result = CliRunner().invoke(main, ["--antithetic", *options])
+    assert result.exit_code == 2
+    assert "--antithetic" in result.output
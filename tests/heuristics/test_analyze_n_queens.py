@@ -0,0 +1,162 @@
+import csv
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from simulation.heuristics.analyze_n_queens import (
+    BATCH_COLUMNS,
+    RESULT_COLUMNS,
+    AnalysisAggregates,
+    batch_times_file,
+    plot_analysis_results,
+    run_analysis,
+    run_analysis_parallel,
+)
+from simulation.instrumentation import InstrumentationStats
+
+
+def test_parallel_analysis_resumes(tmp_path):
+    results_file = run_analysis_parallel(tmp_path, num_iterations=1, runs_per_size=3, max_workers=2)
+    df = pd.read_csv(results_file)
+    assert list(df.columns) == RESULT_COLUMNS
+    assert sorted(df["seed"]) == [0, 1, 2]
+    assert df["solved"].all()
+
+    # Simulate an interrupted sweep: drop the last row and leave a half-written line behind.
+    lines = results_file.read_text().splitlines(keepends=True)
+    results_file.write_text("".join(lines[:-1]) + lines[-1][:5])
+
+    run_analysis_parallel(tmp_path, num_iterations=2, runs_per_size=3, max_workers=2)
+    df = pd.read_csv(results_file)
+    assert sorted(zip(df["size"], df["seed"])) == [(100, 0), (100, 1), (100, 2), (200, 3), (200, 4), (200, 5)]
+
+
+def test_parallel_analysis_merges_instrumentation(tmp_path):
+    stats = InstrumentationStats()
+    results_file = run_analysis_parallel(tmp_path, num_iterations=1, runs_per_size=3, max_workers=2, stats=stats)
+    df = pd.read_csv(results_file)
+    assert list(df.columns) == RESULT_COLUMNS
+    assert stats.counters["find_min_conflict_positions"] == df["steps"].sum()
+    assert stats.summaries["conflicts"].count == df["steps"].sum()
+
+
+def test_parallel_analysis_refuses_other_columns(tmp_path):
+    results_file = tmp_path / "n_queens_analysis.csv"
+    results_file.write_text("size,seed,solved,steps,time_seconds\n100,0,True,50,0.1\n")
+    with pytest.raises(ValueError, match="expected"):
+        run_analysis_parallel(tmp_path, num_iterations=1, runs_per_size=3, max_workers=1)
+    assert results_file.read_text() == "size,seed,solved,steps,time_seconds\n100,0,True,50,0.1\n"
+
+
+def test_batched_analysis_rows(tmp_path):
+    results_file = run_analysis(tmp_path, num_iterations=2, runs_per_size=3, batched=True)
+    df = pd.read_csv(results_file)
+    assert list(df.columns) == RESULT_COLUMNS
+    assert sorted(zip(df["size"], df["seed"])) == [(100, 0), (100, 1), (100, 2), (200, 3), (200, 4), (200, 5)]
+    assert df["solved"].all()
+    assert (df["steps"] > 0).all()
+    # The runs of a batch are not timed one by one.
+    assert df["time_seconds"].isna().all()
+    batches = pd.read_csv(batch_times_file(Path(results_file)))
+    assert list(batches.columns) == BATCH_COLUMNS
+    assert batches["size"].tolist() == [100, 200]
+    assert batches["runs"].tolist() == [3, 3]
+    assert (batches["time_seconds"] > 0).all()
+
+
+def test_parallel_batched_analysis(tmp_path):
+    results_file = run_analysis_parallel(tmp_path, num_iterations=2, runs_per_size=3, max_workers=2, batched=True)
+    df = pd.read_csv(results_file)
+    assert sorted(zip(df["size"], df["seed"])) == [(100, 0), (100, 1), (100, 2), (200, 3), (200, 4), (200, 5)]
+    assert list(df.columns) == RESULT_COLUMNS
+    assert df["time_seconds"].isna().all()
+    batches = pd.read_csv(batch_times_file(results_file))
+    assert sorted(batches["size"]) == [100, 200]
+    assert (batches["time_seconds"] > 0).all()
+
+    aggregates = AnalysisAggregates(results_file)
+    aggregates.update()
+    assert aggregates.sizes[100].runs == 3
+    assert aggregates.sizes[100].timed_runs == 0
+    assert aggregates.statistics()[100]["success_rate"] == 100
+
+
+def _write_rows(path, rows, header=False):
+    with path.open("a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def _rows(size, seeds):
+    return [
+        {"size": size, "seed": seed, "solved": seed % 3 != 0, "steps": 10 * seed + size, "time_seconds": 0.01 * seed}
+        for seed in seeds
+    ]
+
+
+def test_aggregates_match_pandas(tmp_path):
+    results_file = tmp_path / "results.csv"
+    _write_rows(results_file, _rows(8, range(5)) + _rows(16, range(5, 9)), header=True)
+    aggregates = AnalysisAggregates(results_file)
+    assert aggregates.update() == {8, 16}
+
+    df = pd.read_csv(results_file)
+    expected = df.groupby("size").agg(
+        avg_time=("time_seconds", "mean"),
+        std_time=("time_seconds", "std"),
+        success_rate=("solved", lambda x: x.mean() * 100),
+    )
+    solved = df[df["solved"]].groupby("size").agg(avg_steps=("steps", "mean"), std_steps=("steps", "std"))
+    expected = expected.join(solved).fillna(0)
+    for size, stats in aggregates.statistics().items():
+        for column, value in stats.items():
+            assert value == pytest.approx(expected.loc[size, column])
+
+
+def test_aggregates_read_only_appended_rows(tmp_path):
+    results_file = tmp_path / "results.csv"
+    _write_rows(results_file, _rows(8, range(3)), header=True)
+    aggregates = AnalysisAggregates(results_file)
+    aggregates.update()
+    aggregates.save()
+
+    # A half-written row is left for the next update.
+    _write_rows(results_file, _rows(16, range(3, 5)))
+    with results_file.open("a") as f:
+        f.write("16,5,Tr")
+    aggregates = AnalysisAggregates(results_file)
+    assert aggregates.update() == {16}
+    assert aggregates.sizes[8].runs == 3
+    assert aggregates.sizes[16].runs == 2
+
+    with results_file.open("a") as f:
+        f.write("ue,70,0.05\n")
+    assert aggregates.update() == {16}
+    assert aggregates.sizes[16].runs == 3
+    assert aggregates.sizes[16].solved == 2
+
+    # A rewritten file is aggregated from the start.
+    results_file.write_text("")
+    _write_rows(results_file, _rows(32, range(9)), header=True)
+    assert aggregates.update() == {32}
+    assert set(aggregates.sizes) == {32}
+
+
+def test_plots_are_rendered_only_when_their_data_changes(tmp_path):
+    results_file = tmp_path / "results.csv"
+    _write_rows(results_file, _rows(8, range(1, 3)), header=True)
+    plot_analysis_results(results_file, runs_per_size=2)
+    plots = ["n_queens_avg_time.svg", "n_queens_avg_steps.svg", "n_queens_success_rate.svg"]
+    modification_times = {plot: (tmp_path / plot).stat().st_mtime_ns for plot in plots}
+
+    plot_analysis_results(results_file, runs_per_size=2)
+    assert {plot: (tmp_path / plot).stat().st_mtime_ns for plot in plots} == modification_times
+
+    # An unsolved run does not change the steps of the solved runs.
+    _write_rows(results_file, [{"size": 8, "seed": 3, "solved": False, "steps": 800, "time_seconds": 0.05}])
+    plot_analysis_results(results_file, runs_per_size=2)
+    changed = {plot for plot in plots if (tmp_path / plot).stat().st_mtime_ns != modification_times[plot]}
+    assert changed == {"n_queens_avg_time.svg", "n_queens_success_rate.svg"}
@@ -0,0 +1,35 @@
+import pytest
+
+from simulation.heuristics.exact import count_solutions, find_solution
+from simulation.heuristics.n_queens import Solver
+
+SOLUTION_COUNTS = [1, 0, 0, 2, 10, 4, 40, 92, 352, 724, 2680, 14200]
+
+
+@pytest.mark.parametrize("n", range(1, len(SOLUTION_COUNTS) + 1))
+def test_count_solutions(n):
+    assert count_solutions(n, max_workers=1) == SOLUTION_COUNTS[n - 1]
+
+
+@pytest.mark.parametrize("n", [-3, 0, 65])
+def test_count_solutions_rejects_unsupported_sizes(n):
+    with pytest.raises(ValueError, match="from 1 to 64 queens"):
+        count_solutions(n)
+
+
+@pytest.mark.parametrize("prefix_rows", [1, 3, 5])
+def test_count_solutions_on_a_pool(prefix_rows):
+    assert count_solutions(10, max_workers=2, prefix_rows=prefix_rows) == 724
+
+
+@pytest.mark.parametrize("n", [2, 3])
+def test_no_solution(n):
+    assert find_solution(n) is None
+
+
+@pytest.mark.parametrize("n", [1, 4, 8, 20])
+def test_find_solution(n):
+    board = find_solution(n)
+    assert board is not None
+    assert sorted(board.queen_positions_per_row) == list(range(n))
+    assert not Solver(board)._has_conflicts()
@@ -1,6 +1,18 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pytest
 
-from simulation.heuristics.n_queens import Chessboard, Solver, SolverStatus
+from simulation.heuristics.n_queens import (
+    ArrayChessboard,
+    ArraySolver,
+    BatchSolver,
+    Chessboard,
+    Solver,
+    SolverStatus,
+)
+from simulation.instrumentation import InstrumentationStats
 
 
 def test_test():
@@ -47,3 +59,226 @@ def test_n_queens(n):
         for j in range(i + 1, n):
             assert solver.board.queen_positions_per_row[i] != solver.board.queen_positions_per_row[j]
             assert abs(i - j) != abs(solver.board.queen_positions_per_row[i] - solver.board.queen_positions_per_row[j])
+
+
+@pytest.mark.parametrize("n", [8, 50, 200])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_incremental_solver_matches_full_scan(n, seed):
+    max_steps = n * 100
+
+    full_scan_solver = Solver(Chessboard.from_random_permutation(n, seed=seed), max_steps=max_steps)
+    full_scan_solver.solve()
+    incremental_solver = Solver(Chessboard.from_random_permutation(n, seed=seed), max_steps=max_steps, incremental=True)
+    incremental_solver.solve()
+
+    assert incremental_solver.status == SolverStatus.SOLVED
+    assert incremental_solver.current_step == full_scan_solver.current_step
+    assert incremental_solver.board.queen_positions_per_row == full_scan_solver.board.queen_positions_per_row
+    assert incremental_solver.total_conflicts == 0
+
+
+def test_incremental_conflict_index_tracks_moves():
+    board = Chessboard.from_random_permutation(30, seed=3)
+    solver = Solver(board, max_steps=5, incremental=True)
+    with pytest.raises(RuntimeError):
+        solver.solve()
+
+    expected = [solver._count_conflicts_for_position(row, col) for row, col in enumerate(board.queen_positions_per_row)]
+    assert solver.conflict_index.queen_conflicts == expected
+    assert solver.total_conflicts == sum(expected)
+    max_conflicts = max(expected)
+    assert solver._find_max_conflict_queens() == [row for row, c in enumerate(expected) if c == max_conflicts]
+
+
+def test_array_solver_counters_match_list_solver():
+    board = Chessboard.from_random_permutation(100, seed=5)
+    array_board = ArrayChessboard(board.queen_positions_per_row)
+    solver = Solver(board)
+    array_solver = ArraySolver(array_board)
+
+    assert array_board.queen_positions_per_row.dtype == np.int32
+    assert array_solver.row_conflicts.dtype == np.int32
+    assert array_solver.row_conflicts.tolist() == solver.row_conflicts
+    assert array_solver.diag1_conflicts.tolist() == solver.diag1_conflicts
+    assert array_solver.diag2_conflicts.tolist() == solver.diag2_conflicts
+    assert array_solver._find_max_conflict_queens() == solver._find_max_conflict_queens()
+    for row in range(100):
+        assert array_solver._find_min_conflict_positions(row) == solver._find_min_conflict_positions(row)
+
+
+@pytest.mark.parametrize("n", [8, 50, 200])
+@pytest.mark.parametrize("incremental", [False, True])
+def test_array_solver_matches_list_solver(n, incremental):
+    max_steps = n * 100
+
+    solver = Solver(Chessboard.from_random_permutation(n, seed=1), max_steps=max_steps)
+    solver.solve()
+    array_solver = ArraySolver(
+        ArrayChessboard.from_random_permutation(n, seed=1), max_steps=max_steps, incremental=incremental
+    )
+    array_solver.solve()
+
+    assert array_solver.status == SolverStatus.SOLVED
+    assert array_solver.current_step == solver.current_step
+    assert array_solver.board.queen_positions_per_row.tolist() == solver.board.queen_positions_per_row
+
+
+@pytest.mark.parametrize("n", [4, 8, 1000, 20000])
+def test_greedy_initialization(n):
+    board = Chessboard.from_greedy_permutation(n, seed=0)
+    assert sorted(board.queen_positions_per_row) == list(range(n))
+    assert Chessboard.from_greedy_permutation(n, seed=0).queen_positions_per_row == board.queen_positions_per_row
+
+    solver = ArraySolver(ArrayChessboard(board.queen_positions_per_row), max_steps=n * 100)
+    assert solver.total_conflicts < 200
+    solver.solve()
+    assert solver.status == SolverStatus.SOLVED
+    assert solver.current_step < 1000
+
+
+def test_explicit_random_stream_matches_global_seeding():
+    solver = Solver(Chessboard.from_random_permutation(60, seed=9), max_steps=6000)
+    solver.solve()
+
+    rng = random.Random(9)  # noqa: S311
+    isolated_solver = Solver(Chessboard.from_random_permutation(60, rng=rng), max_steps=6000, rng=rng)
+    random.seed(12345)  # The global RNG must not influence the isolated solver.
+    isolated_solver.solve()
+
+    assert isolated_solver.current_step == solver.current_step
+    assert isolated_solver.board.queen_positions_per_row == solver.board.queen_positions_per_row
+
+
+def test_numpy_generator_streams_in_threads():
+    def solve(seed):
+        rng = np.random.default_rng(seed)
+        solver = ArraySolver(ArrayChessboard.from_greedy_permutation(500, rng=rng), max_steps=50_000, rng=rng)
+        solver.solve()
+        return solver.current_step, solver.board.queen_positions_per_row.tolist()
+
+    sequential = [solve(seed) for seed in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        threaded = list(executor.map(solve, range(4)))
+    assert threaded == sequential
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_instrumented_solver_takes_the_same_steps(incremental):
+    reference = Chessboard.from_random_permutation(50, seed=3)
+    Solver(reference, max_steps=5000, incremental=incremental).solve()
+
+    stats = InstrumentationStats()
+    board = Chessboard.from_random_permutation(50, seed=3)
+    solver = Solver(board, max_steps=5000, incremental=incremental, stats=stats)
+    solver.solve()
+    assert board.queen_positions_per_row == reference.queen_positions_per_row
+    assert stats.counters["find_min_conflict_positions"] == solver.current_step
+    assert stats.counters["has_conflicts"] == solver.current_step + 2
+    assert stats.summaries["conflicts"].count == solver.current_step
+    assert stats.summaries["conflicts"].minimum == 0
+
+
+def test_solver_traces_conflicts():
+    stats = InstrumentationStats(trace_length=16)
+    solver = Solver(Chessboard.from_random_permutation(50, seed=3), max_steps=5000, stats=stats)
+    initial_conflicts = solver.total_conflicts
+    solver.solve()
+    trace = stats.traces["conflicts"]
+    assert trace.steps[0] == 0
+    assert trace.values[0] == initial_conflicts
+    assert len(trace.steps) <= 16
+    assert trace.steps == list(range(0, solver.current_step + 1, trace.stride))
+
+
+@pytest.mark.parametrize(("solver_class", "board_class"), [(Solver, Chessboard), (ArraySolver, ArrayChessboard)])
+def test_running_total_conflicts(solver_class, board_class):
+    board = board_class(Chessboard.from_random_permutation(60, seed=5).queen_positions_per_row)
+    solver = solver_class(board, max_steps=20, rng=random.Random(5))  # noqa: S311
+    with pytest.raises(RuntimeError):
+        solver.solve()
+    assert solver.total_conflicts == sum(solver._all_queen_conflicts()) > 0
+
+
+def test_batch_solver():
+    boards = [Chessboard.from_random_permutation(40, rng=random.Random(seed)) for seed in range(6)]  # noqa: S311
+    solver = BatchSolver(boards, max_steps=4000, rng=np.random.default_rng(0))
+    for board, counters in zip(boards, solver.row_conflicts):
+        assert counters.tolist() == Solver(board).row_conflicts
+    solver.solve()
+    assert solver.solved.all()
+    assert (solver.steps > 0).all()
+    for board in boards:
+        assert not Solver(board)._has_conflicts()
+        assert sorted(board.queen_positions_per_row) == list(range(40))
+
+
+def test_batch_solver_step_limit():
+    boards = [Chessboard.from_random_permutation(3, rng=random.Random(seed)) for seed in range(3)]  # noqa: S311
+    solver = BatchSolver(boards, max_steps=7, rng=np.random.default_rng(0))
+    solver.solve()
+    assert not solver.solved.any()
+    assert solver.steps.tolist() == [7, 7, 7]
+
+    with pytest.raises(ValueError, match="same size"):
+        BatchSolver([Chessboard([0]), Chessboard([0, 1])])
+
+
+@pytest.mark.parametrize(
+    ("solver_class", "board_class", "make_rng"),
+    [
+        (Solver, Chessboard, lambda: random.Random(3)),  # noqa: S311
+        (ArraySolver, ArrayChessboard, lambda: np.random.default_rng(3)),
+        (Solver, Chessboard, lambda: None),
+    ],
+)
+@pytest.mark.parametrize("incremental", [False, True])
+def test_solver_resumes_from_checkpoint(tmp_path, solver_class, board_class, make_rng, incremental):
+    n = 200
+    random.seed(5)
+    uninterrupted = solver_class(
+        board_class.from_random_permutation(n, seed=1), max_steps=100 * n, incremental=incremental, rng=make_rng()
+    )
+    uninterrupted.solve()
+
+    random.seed(5)
+    checkpoint_path = tmp_path / "solver.npz"
+    interrupted = solver_class(
+        board_class.from_random_permutation(n, seed=1),
+        max_steps=100 * n,
+        incremental=incremental,
+        rng=make_rng(),
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=25,
+    )
+    interrupted.max_steps = 60  # Stands in for a preemption after the checkpoint of step 50.
+    with pytest.raises(RuntimeError):
+        interrupted.solve()
+
+    resumed = solver_class.resume(checkpoint_path)
+    assert resumed.current_step == 50
+    resumed.max_steps = 100 * n
+    resumed.solve()
+    assert resumed.current_step == uninterrupted.current_step
+    assert list(resumed.board.queen_positions_per_row) == list(uninterrupted.board.queen_positions_per_row)
+    with pytest.raises(ValueError, match="not of a"):
+        (ArraySolver if solver_class is Solver else Solver).resume(checkpoint_path)
+
+
+def test_resumed_solver_keeps_checkpointing(tmp_path):
+    checkpoint_path = tmp_path / "solver.npz"
+    solver = Solver(
+        Chessboard.from_random_permutation(200, seed=1),
+        max_steps=30,
+        rng=random.Random(1),  # noqa: S311
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=10,
+    )
+    with pytest.raises(RuntimeError):
+        solver.solve()
+
+    resumed = Solver.resume(checkpoint_path, checkpoint_interval=10)
+    assert resumed.checkpoint_path == checkpoint_path
+    resumed.max_steps = 50
+    with pytest.raises(RuntimeError):
+        resumed.solve()
+    assert Solver.resume(checkpoint_path).current_step == 50
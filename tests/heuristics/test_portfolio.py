@@ -0,0 +1,45 @@
+import pytest
+
+from simulation.heuristics.n_queens import Chessboard, Solver
+from simulation.heuristics.portfolio import solve_portfolio, solve_with_restarts
+
+
+def assert_valid_solution(board):
+    positions = board.queen_positions_per_row
+    for i in range(board.size):
+        for j in range(i + 1, board.size):
+            assert positions[i] != positions[j]
+            assert abs(i - j) != abs(positions[i] - positions[j])
+
+
+def test_portfolio_finds_solution():
+    result = solve_portfolio(40, attempts=3, max_steps=4000, seed=10, max_workers=2, check_interval=50)
+    assert result.solved
+    assert 1 <= result.attempts <= 3
+    assert result.total_steps >= result.steps
+    assert_valid_solution(result.board)
+
+    # The winning attempt takes the same steps as a standalone solver with the same seed.
+    solver = Solver(Chessboard.from_random_permutation(40, seed=result.seed), max_steps=4000)
+    solver.solve()
+    assert solver.current_step == result.steps
+    assert solver.board.queen_positions_per_row == result.board.queen_positions_per_row
+
+
+@pytest.mark.parametrize("n", [2, 3])
+def test_portfolio_unsolvable_board(n):
+    result = solve_portfolio(n, attempts=2, max_steps=100, max_workers=2, check_interval=30)
+    assert not result.solved
+    assert result.attempts == 2
+    assert result.total_steps == 200
+
+
+def test_restarts():
+    result = solve_with_restarts(3, initial_max_steps=10, growth_factor=2, max_restarts=3)
+    assert not result.solved
+    assert result.attempts == 4
+    assert result.total_steps == 10 + 20 + 40 + 80
+
+    result = solve_with_restarts(50, initial_max_steps=10, max_restarts=20)
+    assert result.solved
+    assert_valid_solution(result.board)
@@ -0,0 +1,29 @@
+from simulation.benchmarks import BenchmarkCase, compare_to_baseline, run_benchmarks
+
+
+def test_run_benchmarks():
+    calls = []
+
+    def run():
+        calls.append(bytearray(2**20))
+        return 10
+
+    results = run_benchmarks([BenchmarkCase("allocate", "steps", run)], repeats=2)
+    (result,) = results["results"]
+    assert len(calls) == 3  # two timed runs and a traced one
+    assert result["name"] == "allocate"
+    assert result["work"] == 10
+    assert result["steps_per_second"] == 10 / result["wall_time_seconds"]
+    assert result["peak_memory_bytes"] >= 2**20
+
+
+def test_compare_to_baseline():
+    baseline = {"results": [{"name": "a", "wall_time_seconds": 1.0}, {"name": "b", "wall_time_seconds": 1.0}]}
+    results = {
+        "results": [
+            {"name": "a", "wall_time_seconds": 1.2},
+            {"name": "b", "wall_time_seconds": 1.5},
+            {"name": "new", "wall_time_seconds": 9.0},
+        ]
+    }
+    assert compare_to_baseline(results, baseline, max_slowdown=1.25) == [("b", 1.5)]
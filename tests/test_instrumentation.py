@@ -0,0 +1,58 @@
+import pytest
+
+from simulation.instrumentation import InstrumentationStats, ValueTrace
+
+
+def test_timed_counts_and_times_calls():
+    stats = InstrumentationStats()
+    double = stats.timed("double", lambda x: 2 * x)
+    assert [double(i) for i in range(3)] == [0, 2, 4]
+    assert stats.counters == {"double": 3}
+    assert stats.timers["double"] >= 0
+    assert "double: " in stats.report()
+
+
+def test_merge():
+    stats, other = InstrumentationStats(), InstrumentationStats()
+    stats.count("events", 2)
+    stats.record("queue_length", 1)
+    other.count("events", 3)
+    other.add_time("run", 0.5)
+    other.record_many("queue_length", [2, 3])
+    stats.merge(other)
+    assert stats.to_dict() == {
+        "counters": {"events": 5},
+        "timers": {"run": 0.5},
+        "summaries": {"queue_length": {"count": 3, "total": 6.0, "min": 1, "max": 3}},
+        "traces": {},
+    }
+    assert stats.summaries["queue_length"].mean == 2.0
+    assert "queue_length: mean 2.00, min 1, max 3 over 3 values" in stats.report()
+
+
+def test_trace_is_thinned_to_its_length():
+    trace = ValueTrace(4)
+    for step in range(10):
+        trace.add(step, 100 - step)
+    assert trace.stride == 4
+    assert trace.steps == [0, 4, 8]
+    assert trace.values == [100, 96, 92]
+
+    # A second run does not extend the trace of the first.
+    trace.add(0, 0)
+    trace.add(12, 0)
+    assert trace.steps == [0, 4, 8]
+
+    with pytest.raises(ValueError):
+        ValueTrace(1)
+
+
+def test_traces_are_opt_in():
+    stats = InstrumentationStats()
+    stats.trace("conflicts", 0, 5)
+    assert stats.traces == {}
+
+    stats, other = InstrumentationStats(trace_length=8), InstrumentationStats(trace_length=8)
+    other.trace("conflicts", 0, 5)
+    stats.merge(other)
+    assert stats.to_dict()["traces"] == {"conflicts": {"stride": 1, "steps": [0], "values": [5]}}
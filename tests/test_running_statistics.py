@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from simulation.running_statistics import RunningStatistics
+
+
+def test_running_statistics_match_numpy():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(size=(1000, 3)) * [1.0, 10.0, 0.1] + [5.0, -2.0, 100.0]
+
+    statistics = RunningStatistics(3)
+    for sample in samples[:100]:
+        statistics.update(sample)
+    statistics.update_batch(samples[100:600])
+    other = RunningStatistics(3)
+    other.update_batch(samples[600:])
+    statistics.merge(other)
+
+    assert statistics.count == 1000
+    np.testing.assert_allclose(statistics.mean, samples.mean(axis=0))
+    np.testing.assert_allclose(statistics.variance, samples.var(axis=0, ddof=1))
+    np.testing.assert_allclose(statistics.std, samples.std(axis=0))
+    np.testing.assert_allclose(statistics.half_width(0.95), 1.959964 * samples.std(axis=0, ddof=1) / np.sqrt(1000))
+
+
+def test_running_statistics_scalar():
+    statistics = RunningStatistics()
+    assert np.isnan(statistics.variance)
+    for value in [1, 2, 3, 4]:
+        statistics.update(value)
+    assert statistics.mean == pytest.approx(2.5)
+    assert statistics.variance == pytest.approx(np.var([1, 2, 3, 4], ddof=1))